@@ -0,0 +1,71 @@
+"""Headless question answering engine behind the Advanced AI Chatbot
+
+Everything here runs without tkinter, and the optional PDF and PPTX backends
+are only imported once a document of that type is read. The names below are
+imported from their submodules the first time they are used, so scripts and
+the command line interface (python -m chatbot_engine) only load what they
+need and start quickly.
+"""
+
+import importlib
+
+# The metrics registry shares its submodule's name, so it is bound up front;
+# a later import of the submodule would otherwise shadow it
+from .metrics import MetricsRegistry, metrics
+
+_exports = {
+    'AdvancedNLG': 'nlg',
+    'ContextualUnderstanding': 'understanding',
+    'DocumentStore': 'index',
+    'CompactPostings': 'index',
+    'DocumentIndex': 'index',
+    'MappedPostings': 'index',
+    'MappedDocumentIndex': 'index',
+    'DocumentCache': 'cache',
+    'SemanticMatcher': 'matcher',
+    'AdvancedResponseEngine': 'engine',
+    'AnswerWorker': 'engine',
+    'QueryCache': 'engine',
+    'Message': 'memory',
+    'MessageLog': 'memory',
+    'SessionStore': 'sessions',
+    'PPTContentGenerator': 'ppt',
+    'DocumentLoader': 'loader',
+    'DocumentCorpus': 'corpus',
+    'index_document': 'corpus',
+}
+
+__all__ = [
+    'AdvancedNLG',
+    'ContextualUnderstanding',
+    'DocumentStore',
+    'CompactPostings',
+    'DocumentIndex',
+    'MappedPostings',
+    'MappedDocumentIndex',
+    'DocumentCache',
+    'SemanticMatcher',
+    'AdvancedResponseEngine',
+    'AnswerWorker',
+    'QueryCache',
+    'Message',
+    'MessageLog',
+    'MetricsRegistry',
+    'metrics',
+    'SessionStore',
+    'PPTContentGenerator',
+    'DocumentLoader',
+    'DocumentCorpus',
+    'index_document',
+]
+
+def __getattr__(name):
+    module = _exports.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
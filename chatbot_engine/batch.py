@@ -0,0 +1,192 @@
+import gc
+import os
+import sys
+import json
+import time
+import argparse
+import itertools
+import multiprocessing
+
+from .cache import DocumentCache
+from .loader import DocumentLoader
+from .engine import AdvancedResponseEngine, answer_record
+
+batch_state = None
+
+class BatchWorker:
+    """Per-process engine answering batch questions against one index
+    
+    The engine is deterministic, so a replay gives the same text for the same
+    question whichever worker answers it.
+    """
+    
+    def __init__(self, index, time_budget=None):
+        self.index = index
+        self.time_budget = time_budget
+        self.engine = AdvancedResponseEngine(deterministic=True, memory_size=0)
+    
+    def answer(self, question):
+        deadline = None if self.time_budget is None else time.monotonic() + self.time_budget
+        answer = self.engine.generate_answer(question, self.index, deadline=deadline)
+        return answer_record(question, answer)
+    
+    def answer_chunk(self, items):
+        records = []
+        for item_id, question in items:
+            record = self.answer(question)
+            if item_id is not None:
+                record = {'id': item_id, **record}
+            records.append(record)
+        return records
+
+def start_batch_worker(index=None, time_budget=None):
+    global batch_state
+    if index is not None:
+        batch_state = BatchWorker(index, time_budget)
+
+def answer_chunk_in_worker(items):
+    """Answer a chunk of (id, question) pairs; runs inside a pool worker"""
+    return batch_state.answer_chunk(items)
+
+def answer_batch(index, items, workers=None, chunk_size=32, time_budget=None):
+    """Answer (id, question) pairs against one index, yielding records in input order
+    
+    Each record is an answer_record with the item id added when it is not
+    None. With more than one worker, chunks of questions are spread over a
+    process pool. Where the platform can fork, workers inherit the index from
+    this process and share its pages copy-on-write instead of unpickling a
+    copy each; elsewhere every worker receives one copy at start-up.
+    """
+    global batch_state
+    
+    if workers is None:
+        workers = os.cpu_count() or 1
+    
+    items = iter(items)
+    chunks = iter(lambda: list(itertools.islice(items, chunk_size)), [])
+    
+    if workers < 2:
+        worker = BatchWorker(index, time_budget)
+        for chunk in chunks:
+            yield from worker.answer_chunk(chunk)
+        return
+    
+    from concurrent.futures import ProcessPoolExecutor
+    
+    if 'fork' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('fork')
+        batch_state = BatchWorker(index, time_budget)
+        initargs = ()
+        
+        # Keep the collector from touching, and so copying, the inherited objects
+        gc.collect()
+        gc.freeze()
+    else:
+        context = None
+        initargs = (index, time_budget)
+    
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                               initializer=start_batch_worker, initargs=initargs)
+    try:
+        # Submit a bounded window of chunks so huge inputs stream through
+        pending = []
+        for chunk in chunks:
+            pending.append(pool.submit(answer_chunk_in_worker, chunk))
+            if len(pending) >= workers * 4:
+                yield from pending.pop(0).result()
+        for future in pending:
+            yield from future.result()
+    finally:
+        pool.shutdown()
+        if context is not None:
+            gc.unfreeze()
+            batch_state = None
+
+def read_questions(lines, field='question', id_field='id'):
+    """Yield (id, question) pairs from JSONL lines
+    
+    A line holds either a JSON string or an object with the question under
+    field; the id is taken from id_field when present. Blank lines are
+    skipped.
+    """
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError:
+            raise ValueError(f"line {number}: not valid JSON")
+        
+        if isinstance(item, str):
+            yield None, item
+        elif isinstance(item, dict) and isinstance(item.get(field), str):
+            yield item.get(id_field), item[field]
+        else:
+            raise ValueError(f"line {number}: expected a string or an object with a '{field}' field")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m chatbot_engine.batch',
+        description="Answer a JSONL file of questions about one document, writing JSONL answers.")
+    parser.add_argument('file', help="TXT, PDF or PPTX file, or a folder of them")
+    parser.add_argument('questions', help="JSONL file of questions, or - for standard input")
+    parser.add_argument('-o', '--output', default='-', help="JSONL output file (default: standard output)")
+    parser.add_argument('--field', default='question', help="question field of each JSON object")
+    parser.add_argument('--id-field', default='id', help="field copied to each answer as its id")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--chunk-size', type=int, default=32, help="questions sent to a worker at a time")
+    parser.add_argument('--time-budget', type=float, default=None,
+                        help="seconds allowed for scoring one question (default: unlimited)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="always extract and index the document from scratch")
+    parser.add_argument('--cache-dir', default=None,
+                        help="document cache directory (default ~/.advanced_chatbot_cache)")
+    args = parser.parse_args(argv)
+    
+    if not os.path.exists(args.file):
+        print(f"error: {args.file}: no such file or directory", file=sys.stderr)
+        return 2
+    
+    loader = DocumentLoader(None if args.no_cache else DocumentCache(args.cache_dir))
+    try:
+        index = loader.load(args.file)
+    except Exception as e:
+        print(f"error: {args.file}: {e}", file=sys.stderr)
+        return 1
+    
+    try:
+        questions = sys.stdin if args.questions == '-' else open(args.questions, 'r', encoding='utf-8')
+    except OSError as e:
+        print(f"error: {args.questions}: {e.strerror or e}", file=sys.stderr)
+        return 2
+    try:
+        output = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    except OSError as e:
+        if questions is not sys.stdin:
+            questions.close()
+        print(f"error: {args.output}: {e.strerror or e}", file=sys.stderr)
+        return 2
+    
+    start = time.perf_counter()
+    count = 0
+    try:
+        items = read_questions(questions, args.field, args.id_field)
+        for record in answer_batch(index, items, args.workers, args.chunk_size, args.time_budget):
+            output.write(json.dumps(record, ensure_ascii=False) + '\n')
+            count += 1
+    except ValueError as e:
+        print(f"error: {args.questions}: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if questions is not sys.stdin:
+            questions.close()
+        if output is not sys.stdout:
+            output.close()
+    
+    elapsed = time.perf_counter() - start
+    print(f"{count} questions in {elapsed:.2f}s ({count / elapsed if elapsed else 0:.1f}/s)", file=sys.stderr)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,326 @@
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import subprocess
+
+from .index import DocumentIndex, DocumentStore
+from .loader import DocumentLoader
+from .engine import AdvancedResponseEngine
+from .matcher import NUMPY_AVAILABLE
+from .ppt import PPTContentGenerator
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+TOPICS = [
+    'neural network', 'data pipeline', 'query planner', 'message broker', 'garbage collector',
+    'load balancer', 'hash table', 'compiler backend', 'file system', 'cache layer',
+    'scheduler', 'tokenizer', 'search index', 'storage engine', 'event loop', 'thread pool'
+]
+
+WORDS = [
+    'fast', 'memory', 'latency', 'throughput', 'request', 'disk', 'network', 'buffer', 'record',
+    'cluster', 'replica', 'version', 'segment', 'block', 'page', 'batch', 'stream', 'worker',
+    'client', 'server', 'config', 'option', 'table', 'column', 'value', 'error', 'retry', 'timeout'
+]
+
+SENTENCES = [
+    "The {a} is a {w1} component that manages {w2} for every {b}.",
+    "A {a} works because the {b} reduces {w1} {w2} under load.",
+    "To configure the {a}, first install the {b}, then set the {w1} option and restart the {w2} service.",
+    "There are several types of {a}, such as the {w1} {a}, the {w2} {a} and the {b}.",
+    "Compared with the {b}, the {a} is faster but uses more {w1} per {w2}.",
+    "For example, a {a} can batch {w1} requests before the {b} writes them to {w2}.",
+    "Each {w1} {w2} passes through the {a} and then the {b} before it reaches the client.",
+    "Operators usually monitor {w1} and {w2} on the {a} to catch problems early.",
+]
+
+QUESTIONS = {
+    'definition': ["What is a {a}?", "Define the {a}", "What are {b} components?"],
+    'explanation': ["Why does the {a} reduce {w1}?", "How does the {b} work?", "Explain the {a}"],
+    'procedure': ["How to configure the {a}?", "What are the steps to install the {b}?", "What is the process for {w1}?"],
+    'comparison': ["What is the difference between the {a} and the {b}?", "Compare the {a} and the {b}",
+                   "Which is better than the other, the {a} or the {b}?"],
+    'examples': ["Give an example of a {a}", "What is an instance of {w1} batching?", "Name systems such as the {b}"],
+    'listing': ["List the types of {a}", "What kinds of {b} exist?", "Which categories of {w1} are there?"],
+    'yes_no': ["Is the {a} faster than the {b}?", "Does the {a} use {w1}?", "Can the {b} run without {w2}?"],
+}
+
+RESPONSE_METHODS = {
+    'definition': 'generate_definition_response',
+    'explanation': 'generate_explanation_response',
+    'procedure': 'generate_procedure_response',
+    'comparison': 'generate_comparison_response',
+    'examples': 'generate_general_response',
+    'listing': 'generate_list_response',
+    'yes_no': 'generate_yes_no_response',
+}
+
+def parse_size(text):
+    """'10KB', '1.5MB' or '500MB' in bytes"""
+    match = re.fullmatch(r'\s*([\d.]+)\s*([KMG]?B?)\s*', text.upper())
+    if match is None:
+        raise ValueError(f"Bad size: {text}")
+    units = {'': 1, 'B': 1, 'K': 1024, 'KB': 1024, 'M': 1024 ** 2, 'MB': 1024 ** 2, 'G': 1024 ** 3, 'GB': 1024 ** 3}
+    return int(float(match.group(1)) * units[match.group(2)])
+
+def iter_synthetic_text(size, seed=0, chunk_size=1024 * 1024):
+    """Yield chunks of a reproducible synthetic document of about size bytes"""
+    rng = random.Random(seed)
+    produced = 0
+    while produced < size:
+        sentences = []
+        length = 0
+        while length < chunk_size and produced + length < size:
+            a, b = rng.sample(TOPICS, 2)
+            w1, w2 = rng.sample(WORDS, 2)
+            sentence = rng.choice(SENTENCES).format(a=a, b=b, w1=w1, w2=w2)
+            sentence = sentence[0].upper() + sentence[1:]
+            sentences.append(sentence)
+            length += len(sentence) + 1
+        chunk = ' '.join(sentences) + ' '
+        produced += len(chunk)
+        yield chunk
+
+def make_questions(seed=0, per_type=3):
+    """Questions for every question type, as (intended type, question) pairs"""
+    rng = random.Random(seed)
+    questions = []
+    for q_type, templates in QUESTIONS.items():
+        for template in templates[:per_type]:
+            a, b = rng.sample(TOPICS, 2)
+            w1, w2 = rng.sample(WORDS, 2)
+            questions.append((q_type, template.format(a=a, b=b, w1=w1, w2=w2)))
+    return questions
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return None
+    rank = max(1, int(round(fraction * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+def summarize_timings(samples):
+    samples = sorted(samples)
+    total = sum(samples)
+    return {
+        'count': len(samples),
+        'mean_ms': total / len(samples) * 1000,
+        'p50_ms': percentile(samples, 0.50) * 1000,
+        'p95_ms': percentile(samples, 0.95) * 1000,
+        'p99_ms': percentile(samples, 0.99) * 1000,
+        'throughput_per_s': len(samples) / total if total else None
+    }
+
+def time_call(samples, function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    samples.append(time.perf_counter() - start)
+    return result
+
+def peak_rss_bytes():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def benchmark_size(size, seed=0, repeat=5, ppt_limit=64 * 1024 * 1024, vectorized=None):
+    """Time every hot path against one synthetic document of size bytes"""
+    results = {}
+    engine = AdvancedResponseEngine(seed=seed, query_cache=False, memory_size=0)
+    matcher = engine.matcher
+    if vectorized is not None:
+        matcher.vectorized = vectorized
+    understanding = matcher.context_understanding
+    
+    # Index build, spilling large documents to a DocumentStore like the loader
+    large = size > DocumentLoader.spill_threshold
+    start = time.perf_counter()
+    index = DocumentIndex(store=DocumentStore() if large else None, name=f"synthetic-{size}")
+    for chunk in iter_synthetic_text(size, seed):
+        index.feed(chunk)
+    index.finish()
+    build_time = time.perf_counter() - start
+    results['index_build'] = {
+        'seconds': build_time,
+        'mb_per_s': index.char_count / build_time / 1024 ** 2,
+        'sentences': len(index)
+    }
+    
+    questions = make_questions(seed)
+    
+    samples = []
+    for _ in range(repeat * 10):
+        for q_type, question in questions:
+            time_call(samples, understanding.analyze_question, question)
+    results['analyze_question'] = summarize_timings(samples)
+    
+    samples = []
+    ranked = {}
+    for _ in range(repeat):
+        for q_type, question in questions:
+            ranked[question] = time_call(samples, matcher.find_relevant_content, question, index)
+    results['find_relevant_content'] = summarize_timings(samples)
+    
+    response_samples = {method: [] for method in RESPONSE_METHODS.values()}
+    classified = {}
+    for _ in range(repeat):
+        for q_type, question in questions:
+            sentences, analysis = ranked[question]
+            classified[question] = analysis['type']
+            if not sentences:
+                continue
+            method = RESPONSE_METHODS[q_type]
+            time_call(response_samples[method], getattr(engine, method), sentences, analysis)
+    for method, samples in response_samples.items():
+        if samples:
+            results[method] = summarize_timings(samples)
+    
+    samples = []
+    analysis = understanding.analyze_question("What is a quantum flux capacitor?")
+    for _ in range(repeat * 10):
+        time_call(samples, engine.generate_no_match_response, "What is a quantum flux capacitor?", analysis)
+    results['generate_no_match_response'] = summarize_timings(samples)
+    
+    # summarize() memoizes its result, so drop it each time to time the work
+    samples = []
+    for _ in range(repeat):
+        index._summary = None
+        time_call(samples, index.summarize)
+    results['generate_summary'] = summarize_timings(samples)
+    
+    if index.char_count <= ppt_limit:
+        generator = PPTContentGenerator()
+        content = index.content
+        samples = []
+        for _ in range(max(1, repeat // 2)):
+            time_call(samples, generator.generate_slide_content, content)
+        results['generate_slide_content'] = summarize_timings(samples)
+        del content
+    
+    misclassified = sorted({q for q_type, q in questions if classified.get(q) != q_type})
+    return {
+        'size_bytes': size,
+        'characters': index.char_count,
+        'peak_rss_bytes': peak_rss_bytes(),
+        'misclassified_questions': misclassified,
+        'timings': results
+    }
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def run_isolated(size, args):
+    """Benchmark one size in a fresh interpreter, so peak memory is its own"""
+    command = [sys.executable, '-m', 'chatbot_engine.benchmark', '--single', str(size),
+               '--seed', str(args.seed), '--repeat', str(args.repeat), '--ppt-limit', args.ppt_limit]
+    if args.no_numpy:
+        command.append('--no-numpy')
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [package_root, os.environ.get('PYTHONPATH')])))
+    completed = subprocess.run(command, capture_output=True, text=True, env=env)
+    if completed.returncode != 0:
+        raise RuntimeError(f"benchmark of {size} bytes failed:\n{completed.stderr}")
+    return json.loads(completed.stdout)
+
+def compare(baseline, current, threshold):
+    """Print p50/p95 changes against a baseline run; returns the number of regressions"""
+    regressions = 0
+    print(f"{'size':>10}  {'operation':<32} {'p50 base':>10} {'p50 now':>10} {'p95 base':>10} {'p95 now':>10}  change")
+    for size, result in current['results'].items():
+        base_result = baseline['results'].get(size)
+        if base_result is None:
+            continue
+        for operation, stats in result['timings'].items():
+            base = base_result['timings'].get(operation)
+            if base is None or 'p50_ms' not in stats:
+                continue
+            change = stats['p50_ms'] / base['p50_ms'] - 1 if base['p50_ms'] else 0.0
+            flag = ''
+            if change > threshold:
+                flag = '  REGRESSION'
+                regressions += 1
+            print(f"{size:>10}  {operation:<32} {base['p50_ms']:>10.3f} {stats['p50_ms']:>10.3f} "
+                  f"{base['p95_ms']:>10.3f} {stats['p95_ms']:>10.3f}  {change:+.1%}{flag}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m chatbot_engine.benchmark',
+        description="Time the retrieval and generation hot paths on synthetic documents.")
+    parser.add_argument('--sizes', default='10KB,100KB,1MB,10MB',
+                        help="comma-separated document sizes, up to e.g. 500MB (default: %(default)s)")
+    parser.add_argument('--repeat', type=int, default=5, help="passes over the question set (default: 5)")
+    parser.add_argument('--seed', type=int, default=0, help="seed for documents, questions and phrasing")
+    parser.add_argument('--ppt-limit', default='64MB',
+                        help="largest document to time slide generation on (default: %(default)s)")
+    parser.add_argument('-o', '--output', help="write results as JSON to this file")
+    parser.add_argument('--compare', metavar='BASELINE', help="JSON results of an earlier run to compare with")
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help="p50 slowdown reported as a regression (default: 0.10)")
+    parser.add_argument('--no-numpy', action='store_true',
+                        help="score in pure Python even when NumPy is installed")
+    parser.add_argument('--single', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    
+    if args.single is not None:
+        result = benchmark_size(args.single, args.seed, args.repeat, parse_size(args.ppt_limit),
+                                False if args.no_numpy else None)
+        print(json.dumps(result))
+        return 0
+    
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'numpy': NUMPY_AVAILABLE and not args.no_numpy
+        },
+        'results': {}
+    }
+    
+    for label in args.sizes.split(','):
+        size = parse_size(label)
+        print(f"Benchmarking {label.strip()} ...", file=sys.stderr)
+        result = run_isolated(size, args)
+        report['results'][label.strip()] = result
+        
+        timings = result['timings']
+        peak = result['peak_rss_bytes']
+        print(f"  index build {timings['index_build']['seconds']:.2f}s "
+              f"({timings['index_build']['mb_per_s']:.1f} MB/s), "
+              f"find_relevant_content p50 {timings['find_relevant_content']['p50_ms']:.2f} ms "
+              f"p99 {timings['find_relevant_content']['p99_ms']:.2f} ms"
+              + (f", peak RSS {peak / 1024 ** 2:.0f} MB" if peak else ""), file=sys.stderr)
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+    
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if compare(baseline, report, args.threshold):
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,240 @@
+import os
+import sys
+import json
+import mmap
+import struct
+import hashlib
+import threading
+from array import array
+
+from .index import MappedDocumentIndex
+
+class DocumentCache:
+    """Size-bounded on-disk cache of extracted and indexed documents
+    
+    Entries are keyed by the SHA-256 of the file bytes plus the extractor
+    version, and hold the text, sentence spans, counts and postings in one
+    binary file of 8-byte aligned sections that is memory-mapped on load. The
+    least recently used entries are evicted once the cache exceeds max_bytes.
+    """
+    
+    magic = b'NCBIDX01'
+    format_version = 3
+    section_names = [
+        'meta', 'text', 'sentence_starts', 'sentence_ends', 'word_counts', 'token_counts',
+        'sentence_pages', 'sentence_paragraphs', 'term_blob', 'term_offsets', 'posting_offsets', 'posting_sentence_ids', 'posting_frequencies'
+    ]
+    section_types = {
+        'sentence_starts': 'Q', 'sentence_ends': 'Q', 'word_counts': 'I', 'token_counts': 'I',
+        'sentence_pages': 'I', 'sentence_paragraphs': 'I',
+        'term_offsets': 'Q', 'posting_offsets': 'Q', 'posting_sentence_ids': 'I', 'posting_frequencies': 'I'
+    }
+    
+    def __init__(self, directory=None, max_bytes=2 * 1024 ** 3):
+        if directory is None:
+            directory = os.path.join(os.path.expanduser('~'), '.advanced_chatbot_cache')
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        
+        # Hashes of files seen before, keyed by path, size and mtime, so an
+        # unchanged file is not re-read just to compute its key
+        self.hash_file = os.path.join(directory, 'hashes.json')
+        try:
+            with open(self.hash_file, 'r', encoding='utf-8') as f:
+                self.known_hashes = json.load(f)
+        except (OSError, ValueError):
+            self.known_hashes = {}
+    
+    def key_for(self, file_path, extractor_version):
+        stat = os.stat(file_path)
+        stat_key = f"{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+        
+        digest = self.known_hashes.get(stat_key)
+        if digest is None:
+            sha = hashlib.sha256()
+            with open(file_path, 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b''):
+                    sha.update(block)
+            digest = sha.hexdigest()
+            with self.lock:
+                self.known_hashes[stat_key] = digest
+                self.save_known_hashes()
+        
+        return f"{digest}-v{extractor_version}"
+    
+    def key_for_bytes(self, data, extractor_version):
+        """Key for file contents already in memory, such as an upload"""
+        return f"{hashlib.sha256(data).hexdigest()}-v{extractor_version}"
+    
+    def key_for_fingerprint(self, fingerprint, extractor_version):
+        """Key for text known only by its DocumentIndex.fingerprint, such as a stored session's
+        
+        The fingerprint is the SHA-256 of the UTF-8 text, so this is also the
+        key of a .txt file holding exactly that text.
+        """
+        return f"{fingerprint}-v{extractor_version}"
+    
+    def save_known_hashes(self):
+        tmp_path = self.hash_file + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.known_hashes, f)
+            os.replace(tmp_path, self.hash_file)
+        except OSError:
+            pass
+    
+    def entry_path(self, key):
+        return os.path.join(self.directory, key + '.idx')
+    
+    def get(self, key):
+        """Open a cached index, or return None on a miss or unreadable entry"""
+        path = self.entry_path(key)
+        try:
+            index = self.read_entry(path)
+            os.utime(path)  # Mark as recently used
+            return index
+        except (OSError, ValueError, KeyError, struct.error):
+            return None
+    
+    def put(self, key, index, filename=None):
+        path = self.entry_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            self.write_entry(tmp_path, index, filename)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self.evict(keep=path)
+    
+    def evict(self, keep=None):
+        """Delete least recently used entries until the cache fits in max_bytes"""
+        with self.lock:
+            entries = []
+            for name in os.listdir(self.directory):
+                if name.endswith('.idx'):
+                    path = os.path.join(self.directory, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, path))
+            
+            total = sum(size for mtime, size, path in entries)
+            for mtime, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass  # Still mapped by an open index on some platforms
+    
+    def write_entry(self, path, index, filename):
+        if index.store is not None:
+            # Spans already are byte offsets into the store
+            content = None
+            text = index.store.bytes_view()
+        else:
+            content = index.content
+            text = content.encode('utf-8', 'surrogatepass')
+        
+        # Sentence spans are character offsets; the cache stores byte offsets
+        if content is None or len(text) == len(content):
+            starts, ends = index.sentence_starts, index.sentence_ends
+        else:
+            starts, ends = array('Q'), array('Q')
+            char_pos = byte_pos = 0
+            for start, end in zip(index.sentence_starts, index.sentence_ends):
+                byte_pos += len(content[char_pos:start].encode('utf-8', 'surrogatepass'))
+                starts.append(byte_pos)
+                byte_pos += len(content[start:end].encode('utf-8', 'surrogatepass'))
+                ends.append(byte_pos)
+                char_pos = end
+        
+        # Code point order equals UTF-8 byte order, so sorting the str keys
+        # gives the byte-sorted string table MappedPostings searches
+        term_chunks = []
+        term_offsets = array('Q', [0])
+        posting_offsets = array('Q', [0])
+        sentence_ids = array('I')
+        frequencies = array('I')
+        for term in sorted(index.postings):
+            encoded = term.encode('utf-8', 'surrogatepass')
+            term_chunks.append(encoded)
+            term_offsets.append(term_offsets[-1] + len(encoded))
+            for sentence_id, tf in index.postings[term]:
+                sentence_ids.append(sentence_id)
+                frequencies.append(tf)
+            posting_offsets.append(len(sentence_ids))
+        
+        meta = {
+            'filename': index.name if filename is None else filename,
+            'byteorder': sys.byteorder,
+            'char_count': index.char_count,
+            'stripped_length': index.stripped_length,
+            'total_tokens': index.total_tokens,
+            'summary': index.summarize(),
+            'fingerprint': hashlib.sha256(text).hexdigest(),
+        }
+        sections = {
+            'meta': json.dumps(meta).encode('utf-8'),
+            'text': text,
+            'sentence_starts': array('Q', starts),
+            'sentence_ends': array('Q', ends),
+            'word_counts': array('I', index.word_counts),
+            'token_counts': array('I', index.token_counts),
+            'sentence_pages': array('I', index.sentence_pages),
+            'sentence_paragraphs': array('I', index.sentence_paragraphs),
+            'term_blob': b''.join(term_chunks),
+            'term_offsets': term_offsets,
+            'posting_offsets': posting_offsets,
+            'posting_sentence_ids': sentence_ids,
+            'posting_frequencies': frequencies,
+        }
+        
+        header_size = 16 + 16 * len(self.section_names)
+        table = []
+        offset = header_size
+        for name in self.section_names:
+            size = len(sections[name]) * getattr(sections[name], 'itemsize', 1)
+            table.append((offset, size))
+            offset += size + (-size % 8)
+        
+        with open(path, 'wb') as f:
+            f.write(struct.pack('<8sII', self.magic, self.format_version, len(self.section_names)))
+            for entry in table:
+                f.write(struct.pack('<QQ', *entry))
+            for name, (offset, size) in zip(self.section_names, table):
+                f.write(sections[name])
+                f.write(b'\0' * (-size % 8))
+    
+    def read_entry(self, path):
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                raise ValueError("Empty cache entry")
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        view = memoryview(mapped)
+        magic, version, count = struct.unpack_from('<8sII', mapped, 0)
+        if magic != self.magic or version != self.format_version or count != len(self.section_names):
+            raise ValueError("Incompatible cache entry")
+        
+        sections = {}
+        for i, name in enumerate(self.section_names):
+            offset, size = struct.unpack_from('<QQ', mapped, 16 + 16 * i)
+            section = view[offset:offset + size]
+            if name in self.section_types:
+                section = section.cast(self.section_types[name])
+            sections[name] = section
+        
+        meta = json.loads(bytes(sections['meta']).decode('utf-8'))
+        if meta['byteorder'] != sys.byteorder:
+            raise ValueError("Cache entry written on a different byte order")
+        
+        return MappedDocumentIndex(path, meta, sections)
@@ -0,0 +1,84 @@
+import os
+import sys
+import json
+import argparse
+
+from .cache import DocumentCache
+from .loader import DocumentLoader
+from .engine import AdvancedResponseEngine, answer_record
+from .metrics import metrics
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m chatbot_engine',
+        description="Answer questions about a document. Questions are read one per "
+                    "line from standard input unless given with -q.")
+    parser.add_argument('file', help="TXT, PDF or PPTX file, or a folder of them")
+    parser.add_argument('-q', '--question', action='append', default=[],
+                        help="question to answer; may be repeated")
+    parser.add_argument('--json', action='store_true',
+                        help="print one JSON object per answer, with the matched sentences")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="always extract and index the document from scratch")
+    parser.add_argument('--cache-dir', default=None,
+                        help="document cache directory (default ~/.advanced_chatbot_cache)")
+    parser.add_argument('--deterministic', action='store_true',
+                        help="give identical answers to identical questions about a document")
+    parser.add_argument('--summary', action='store_true',
+                        help="print the document summary before any answers")
+    parser.add_argument('--metrics', choices=['json', 'prometheus'],
+                        help="time each loading and answering stage and print the totals to standard error")
+    return parser
+
+def iter_questions(args, stream):
+    if args.question:
+        yield from args.question
+        return
+    for line in stream:
+        question = line.strip()
+        if question:
+            yield question
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    
+    if not os.path.exists(args.file):
+        print(f"error: {args.file}: no such file or directory", file=sys.stderr)
+        return 2
+    
+    if args.metrics:
+        metrics.enable()
+    
+    cache = None if args.no_cache else DocumentCache(args.cache_dir)
+    loader = DocumentLoader(cache)
+    if not os.path.isdir(args.file):
+        extension = os.path.splitext(args.file)[1].lower()
+        if not loader.is_supported(extension):
+            print(f"error: cannot process {extension or 'extensionless'} files", file=sys.stderr)
+            return 2
+    
+    try:
+        index = loader.load(args.file)
+    except Exception as e:
+        print(f"error: {args.file}: {e}", file=sys.stderr)
+        return 1
+    
+    if args.summary:
+        print(index.summarize())
+        print()
+    
+    engine = AdvancedResponseEngine(deterministic=args.deterministic)
+    for question in iter_questions(args, sys.stdin):
+        answer = engine.generate_answer(question, index)
+        if args.json:
+            print(json.dumps(answer_record(question, answer), ensure_ascii=False))
+        else:
+            print(answer['response'])
+            print()
+        sys.stdout.flush()
+    
+    if args.metrics == 'json':
+        print(metrics.to_json(), file=sys.stderr)
+    elif args.metrics == 'prometheus':
+        print(metrics.to_prometheus(), end='', file=sys.stderr)
+    return 0
@@ -0,0 +1,131 @@
+import os
+from array import array
+
+from .index import DocumentIndex
+from .extractors import iter_document_pages
+
+def index_document(file_path):
+    """Extract and index one file; runs inside a corpus worker process"""
+    index = DocumentIndex(name=os.path.basename(file_path))
+    for number, count, text in iter_document_pages(file_path, workers=1):
+        index.feed(text, page=number)
+    index.finish()
+    return index
+
+class DocumentCorpus(DocumentIndex):
+    """One shared index over many documents, queried like a single DocumentIndex
+    
+    Files are extracted and indexed in parallel by a process pool and merged
+    in input order, so sentence ids are corpus-wide and stable for a given
+    list of files. location() reports the file and page of every sentence, and
+    the position bonus applies to the opening sentences of each document.
+    """
+    
+    separator = "\n\n"
+    
+    def __init__(self, name=""):
+        super().__init__(name=name)
+        self.documents = []
+        self.document_starts = []
+        self.sentence_documents = array('I')
+        self.failed = []
+        self.finished = True
+    
+    def location(self, sentence_id):
+        return self.documents[self.sentence_documents[sentence_id]], self.sentence_pages[sentence_id]
+    
+    def position_bonus(self, sentence_id):
+        document_start = self.document_starts[self.sentence_documents[sentence_id]]
+        return super().position_bonus(sentence_id - document_start)
+    
+    def position_bonuses(self):
+        count = len(self.sentence_ends)
+        bonuses = []
+        for start, end in zip(self.document_starts, self.document_starts[1:] + [count]):
+            bonuses.extend((i, self.position_bonus(i)) for i in range(start, min(start + 20, end)))
+        return bonuses
+    
+    def add_document(self, index):
+        """Append an indexed document, shifting its sentence ids and spans"""
+        if self.parts:
+            self.parts.append(self.separator)
+            self.char_count += len(self.separator)
+            self.track_space(self.separator)
+        text_offset = self.char_count
+        content = index.content
+        self.parts.append(content)
+        self.char_count += index.char_count
+        self.track_space(content)
+        
+        document_id = len(self.documents)
+        base = len(self.sentences)
+        self.documents.append(index.name)
+        self.document_starts.append(base)
+        
+        # Per-sentence data first, postings last, as in add_sentence
+        self.sentence_starts.extend(text_offset + start for start in index.sentence_starts)
+        self.word_counts.extend(index.word_counts)
+        self.token_counts.extend(index.token_counts)
+        self.sentence_pages.extend(index.sentence_pages)
+        # Paragraphs never span documents
+        paragraph_base = self.sentence_paragraphs[-1] + 1 if self.sentence_paragraphs else 0
+        self.sentence_paragraphs.extend(paragraph_base + paragraph for paragraph in index.sentence_paragraphs)
+        self.sentence_documents.extend([document_id] * len(index))
+        self.total_tokens += index.total_tokens
+        self.tokens.extend(index.tokens)
+        self.sentences.extend(index.sentences)
+        self.sentence_ends.extend(text_offset + end for end in index.sentence_ends)
+        
+        for term, postings in index.postings.items():
+            self.postings[term].extend((base + sentence_id, tf) for sentence_id, tf in postings)
+    
+    def append(self, text, name="Manual input"):
+        """Add text to the corpus as one more document"""
+        self.add_document(DocumentIndex(text, name=name))
+    
+    def ingest(self, paths, workers=None, progress=None, cancel_event=None):
+        """Index every file in paths, in parallel when there are spare cores
+        
+        Files that fail to extract are skipped and listed in self.failed.
+        progress(done, total) is called after each file is merged.
+        """
+        paths = list(paths)
+        if workers is None:
+            workers = os.cpu_count() or 1
+        
+        def merge(n, path, result):
+            if isinstance(result, Exception):
+                self.failed.append((path, str(result)))
+            else:
+                self.add_document(result)
+            if progress:
+                progress(n, len(paths))
+        
+        if workers < 2 or len(paths) < 2:
+            for n, path in enumerate(paths, 1):
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                try:
+                    result = index_document(path)
+                except Exception as e:
+                    result = e
+                merge(n, path, result)
+            return
+        
+        from concurrent.futures import ProcessPoolExecutor
+        
+        pool = ProcessPoolExecutor(max_workers=min(workers, len(paths)))
+        futures = [pool.submit(index_document, path) for path in paths]
+        try:
+            for n, (path, future) in enumerate(zip(paths, futures), 1):
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = e
+                merge(n, path, result)
+        finally:
+            for future in futures:
+                future.cancel()
+            pool.shutdown(wait=False)
@@ -0,0 +1,451 @@
+import re
+import time
+import queue
+import random
+import threading
+from collections import OrderedDict
+
+from .nlg import AdvancedNLG
+from .matcher import SemanticMatcher
+from .corpus import DocumentCorpus
+from .memory import MessageLog
+from .metrics import metrics
+
+def answer_record(question, answer):
+    """Flatten a generate_answer result into a JSON-serializable dict"""
+    analysis = answer['analysis']
+    return {
+        'question': question,
+        'type': analysis['type'] if analysis else None,
+        'response': answer['response'],
+        'matches': [
+            {'id': match['id'], 'score': round(match['score'], 4),
+             'source': match['source'], 'page': match['page'], 'text': match['text']}
+            for match in answer['matches']
+        ]
+    }
+
+class QueryCache:
+    """Thread-safe LRU cache of rankings, with entries expiring after ttl seconds
+    
+    Values are the ranked (sentence id, score, matched terms) tuples of a
+    question, without the sentence text, which is read back from the index.
+    
+    Keys start with the document fingerprint, so a ranking is never served
+    for text other than the one it was computed on: when content changes,
+    its old entries simply stop being looked up and age out.
+    """
+    
+    def __init__(self, max_entries=1024, ttl=600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and self.ttl is not None and time.monotonic() - entry[0] > self.ttl:
+                del self.entries[key]
+                self.expirations += 1
+                entry = None
+            
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic(), value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+    
+    def invalidate(self, fingerprint=None):
+        """Drop the entries of one document, or all entries"""
+        with self.lock:
+            if fingerprint is None:
+                self.entries.clear()
+            else:
+                for key in [key for key in self.entries if key[0] == fingerprint]:
+                    del self.entries[key]
+    
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
+
+class AdvancedResponseEngine:
+    """Generates highly natural, context-aware responses
+    
+    Phrasing is drawn from the engine's own random.Random, seeded with seed.
+    In deterministic mode it is reseeded from the document fingerprint and
+    the question's query_key before every answer, so the same question about
+    the same text always gets the same response.
+    
+    Rankings of finished documents are kept in a QueryCache, which engines
+    may share; pass query_cache=False to disable it. On a hit only the
+    question analysis, which the key is made from, and response generation
+    run again.
+    
+    conversation_memory holds the last memory_size questions and answers;
+    with memory_size=0 nothing is recorded, for callers that keep their own
+    transcript.
+    """
+    
+    def __init__(self, seed=None, deterministic=False, query_cache=None, memory_size=100):
+        self.random = random.Random(seed)
+        self.deterministic = deterministic
+        self.nlg = AdvancedNLG(self.random)
+        self.matcher = SemanticMatcher()
+        self.conversation_memory = MessageLog(memory_size * 2) if memory_size else None
+        if query_cache is None:
+            query_cache = QueryCache()
+        self.query_cache = query_cache or None
+    
+    def query_key(self, analysis):
+        """Cache key part for a question: its type and its sorted concepts
+        
+        Questions differing only in case, punctuation, stop words or word
+        order share a key. Phrases are keyed on the words the matcher searches
+        for, so 'balancer?' and 'balancer' are the same. The type is kept
+        because stop words such as 'is' decide yes/no questions.
+        """
+        concepts = analysis['concepts']
+        phrases = [phrase for phrase, phrase_tokens in self.matcher.phrase_tokens(concepts['phrases'])]
+        return (analysis['type'], tuple(sorted(concepts['keywords'])), tuple(sorted(phrases)))
+    
+    def analyze_question(self, question):
+        with metrics.timer('analyze_question'):
+            return self.matcher.context_understanding.analyze_question(question)
+    
+    def find_relevant_content(self, question, index, deadline=None, cancel_event=None, analysis=None):
+        """SemanticMatcher.find_relevant_content behind the query cache"""
+        # A document still loading changes under every question; don't cache it
+        if self.query_cache is None or not index.finished:
+            return self.matcher.find_relevant_content(
+                question, index, deadline=deadline, cancel_event=cancel_event, analysis=analysis)
+        
+        if analysis is None:
+            analysis = self.analyze_question(question)
+        key = (index.fingerprint, self.query_key(analysis))
+        ranked = self.query_cache.get(key)
+        metrics.count('query_cache.hits' if ranked is not None else 'query_cache.misses')
+        if ranked is not None:
+            return [self.matcher.result_for(index, sentence_id, score, list(matches))
+                    for sentence_id, score, matches in ranked], analysis
+        
+        relevant, analysis = self.matcher.find_relevant_content(
+            question, index, deadline=deadline, cancel_event=cancel_event, analysis=analysis)
+        
+        # A search cut short by the deadline or a cancel may have missed better matches
+        if not self.matcher.out_of_time(deadline, cancel_event):
+            ranked = [(result['id'], result['score'], result['matches']) for result in relevant]
+            self.query_cache.put(key, ranked)
+        return relevant, analysis
+    
+    def generate_response(self, question, index, deadline=None, cancel_event=None):
+        """Generate natural, intelligent response from a prebuilt DocumentIndex
+        
+        deadline and cancel_event bound the search, see find_relevant_content.
+        """
+        return self.generate_answer(question, index, deadline, cancel_event)['response']
+    
+    def generate_answer(self, question, index, deadline=None, cancel_event=None):
+        """Like generate_response, but also return the matches behind the answer
+        
+        Returns a dict with the response text, the ranked matches from
+        find_relevant_content and the question analysis (None when there was
+        not enough content to search).
+        """
+        if index is None or index.stripped_length < 20:
+            return {
+                'response': "I don't have enough content to answer that question. Could you upload or enter some text first?",
+                'matches': [],
+                'analysis': None
+            }
+        
+        analysis = None
+        if self.deterministic:
+            # Seeded like the query cache is keyed, so rephrasings that rank
+            # the same also answer the same
+            analysis = self.analyze_question(question)
+            self.random.seed(f"{index.fingerprint}\n{self.query_key(analysis)!r}")
+        
+        # Find relevant content
+        relevant_sentences, analysis = self.find_relevant_content(
+            question, index, deadline, cancel_event, analysis)
+        
+        if not relevant_sentences or relevant_sentences[0]['score'] < 1:
+            with metrics.timer('generate_no_match_response'):
+                response = self.generate_no_match_response(question, analysis)
+        else:
+            response = self.compose_response(relevant_sentences, analysis)
+            
+            # Across many documents, say where the answer came from
+            if isinstance(index, DocumentCorpus):
+                response += "\n\n" + self.format_sources(relevant_sentences)
+            
+            # Store in conversation memory
+            if self.conversation_memory is not None:
+                self.conversation_memory.append('user', question)
+                self.conversation_memory.append('bot', response)
+        
+        return {'response': response, 'matches': relevant_sentences, 'analysis': analysis}
+    
+    def compose_response(self, relevant_sentences, analysis):
+        """Generate response based on question type"""
+        if analysis['type'] == 'definition':
+            generate = self.generate_definition_response
+        elif analysis['type'] == 'explanation':
+            generate = self.generate_explanation_response
+        elif analysis['type'] == 'procedure':
+            generate = self.generate_procedure_response
+        elif analysis['type'] == 'comparison':
+            generate = self.generate_comparison_response
+        elif analysis['type'] == 'listing':
+            generate = self.generate_list_response
+        elif analysis['type'] == 'yes_no':
+            generate = self.generate_yes_no_response
+        else:
+            generate = self.generate_general_response
+        
+        with metrics.timer(generate.__name__):
+            return generate(relevant_sentences, analysis)
+    
+    def format_sources(self, sentences):
+        """List the files and pages the top sentences came from"""
+        sources = []
+        for s in sentences[:3]:
+            source = f"{s['source']} (p. {s['page']})"
+            if source not in sources:
+                sources.append(source)
+        return "📎 Sources: " + ", ".join(sources)
+    
+    def generate_definition_response(self, sentences, analysis):
+        """Generate definition-style response"""
+        intros = [
+            "Let me explain what I found:",
+            "Based on the document, here's the definition:",
+            "From what I can see,",
+            "According to the content,",
+        ]
+        
+        main_sentence = self.nlg.paraphrase_intelligently(sentences[0]['text'])
+        
+        response = f"{self.random.choice(intros)} {main_sentence}"
+        
+        # Add supporting detail
+        if len(sentences) > 1 and sentences[1]['score'] > 2:
+            support = self.nlg.paraphrase_intelligently(sentences[1]['text'])
+            response += f" {self.random.choice(self.nlg.transitions['elaboration'])} {support}"
+        
+        # Add engagement
+        if self.random.random() > 0.5:
+            response += "\n\n" + self.random.choice(self.nlg.engagers)
+        
+        return response
+    
+    def generate_explanation_response(self, sentences, analysis):
+        """Generate explanatory response"""
+        intros = [
+            "Here's how this works:",
+            "Let me break this down for you:",
+            "The reason behind this is interesting:",
+            "From what the document explains,",
+        ]
+        
+        # Use top 3 sentences
+        top_sentences = [self.nlg.paraphrase_intelligently(s['text']) for s in sentences[:3]]
+        
+        response = f"{self.random.choice(intros)} {top_sentences[0]}"
+        
+        if len(top_sentences) > 1:
+            response += f" {self.random.choice(self.nlg.transitions['addition'])} {top_sentences[1]}"
+        
+        if len(top_sentences) > 2 and sentences[2]['score'] > 2:
+            response += f" {self.random.choice(self.nlg.transitions['result'])} {top_sentences[2]}"
+        
+        response += "\n\nDoes this explanation make sense?"
+        
+        return response
+    
+    def generate_procedure_response(self, sentences, analysis):
+        """Generate step-by-step response"""
+        response = "Here's the process I found in the document:\n\n"
+        
+        # Look for numbered steps or sequential info
+        steps = []
+        for s in sentences[:5]:
+            text = s['text']
+            # Check if it's a step
+            if re.search(r'\bfirst\b|\bsecond\b|\bstep\b|\bthen\b|\bnext\b', text.lower()):
+                steps.append(self.nlg.paraphrase_intelligently(text))
+        
+        if steps:
+            for i, step in enumerate(steps, 1):
+                response += f"{i}. {step}\n\n"
+        else:
+            # Create a flowing explanation instead
+            response = "Let me walk you through this:\n\n"
+            for s in sentences[:3]:
+                response += f"• {self.nlg.paraphrase_intelligently(s['text'])}\n\n"
+        
+        response += "Would you like me to clarify any of these points?"
+        
+        return response
+    
+    def generate_list_response(self, sentences, analysis):
+        """Generate list-style response"""
+        response = "Here's what I found:\n\n"
+        
+        items = []
+        for s in sentences[:5]:
+            text = s['text']
+            # Look for list indicators
+            if ',' in text or 'include' in text.lower():
+                items.append(self.nlg.paraphrase_intelligently(text))
+        
+        if items:
+            for item in items:
+                response += f"• {item}\n\n"
+        else:
+            response = "Based on the content:\n\n"
+            for s in sentences[:4]:
+                response += f"• {self.nlg.paraphrase_intelligently(s['text'])}\n\n"
+        
+        return response.strip()
+    
+    def generate_yes_no_response(self, sentences, analysis):
+        """Generate yes/no response with explanation"""
+        # Determine yes or no based on content
+        top_sentence = sentences[0]['text'].lower()
+        
+        # Look for affirmative or negative indicators
+        positive_words = ['yes', 'correct', 'true', 'indeed', 'certainly', 'does', 'is', 'can', 'will']
+        negative_words = ['no', 'not', 'never', 'cannot', 'won\'t', 'doesn\'t', 'isn\'t']
+        
+        pos_count = sum(1 for word in positive_words if word in top_sentence)
+        neg_count = sum(1 for word in negative_words if word in top_sentence)
+        
+        if pos_count > neg_count:
+            answer = "Yes"
+        elif neg_count > pos_count:
+            answer = "No"
+        else:
+            answer = "Based on what I found"
+        
+        main_text = self.nlg.paraphrase_intelligently(sentences[0]['text'])
+        
+        response = f"{answer}, {main_text}"
+        
+        # Add supporting evidence
+        if len(sentences) > 1:
+            support = self.nlg.paraphrase_intelligently(sentences[1]['text'])
+            response += f" {self.random.choice(self.nlg.transitions['elaboration'])} {support}"
+        
+        return response
+    
+    def generate_general_response(self, sentences, analysis):
+        """Generate general informative response"""
+        # Use the NLG to create a natural paragraph
+        sentence_texts = [s['text'] for s in sentences[:3]]
+        paraphrased = [self.nlg.paraphrase_intelligently(s) for s in sentence_texts]
+        
+        response = self.nlg.create_human_paragraph(paraphrased, style='helpful')
+        
+        return response
+    
+    def generate_comparison_response(self, sentences, analysis):
+        """Generate comparison response"""
+        response = "Let me compare these for you:\n\n"
+        
+        # Try to find contrasting information
+        for s in sentences[:4]:
+            text = s['text']
+            if 'differ' in text.lower() or 'while' in text.lower() or 'whereas' in text.lower():
+                response += f"{self.nlg.paraphrase_intelligently(text)}\n\n"
+        
+        if response == "Let me compare these for you:\n\n":
+            # No explicit comparison found, provide available info
+            response = "Here's what I found about this:\n\n"
+            for s in sentences[:3]:
+                response += f"• {self.nlg.paraphrase_intelligently(s['text'])}\n\n"
+        
+        return response.strip()
+    
+    def generate_no_match_response(self, question, analysis):
+        """Generate helpful response when no match found"""
+        responses = [
+            f"I couldn't find specific information about {', '.join(analysis['concepts']['keywords'][:2])} in the uploaded content. Could you rephrase your question or ask about something else?",
+            f"Hmm, I don't see details about {', '.join(analysis['concepts']['keywords'][:2])} in the document. What else would you like to know?",
+            f"I searched for information related to your question, but couldn't find a clear answer in the content. Try asking about a different topic!",
+            "That's a great question, but I don't have enough relevant information in the current document to answer it properly. Could you ask something else?",
+        ]
+        
+        return self.random.choice(responses)
+
+class AnswerWorker:
+    """Generates answers on a single worker thread
+    
+    Only the newest question matters: asking again cancels the computation in
+    flight and replaces any question still waiting, so rapid typing never
+    queues up work. Each answer is limited to time_budget seconds, after which
+    the best matches found so far are used. Finished answers are posted as
+    (request_id, response) tuples on a queue for the UI to poll.
+    """
+    
+    def __init__(self, engine, time_budget=1.5):
+        self.engine = engine
+        self.time_budget = time_budget
+        self.results = queue.Queue()
+        self.request_id = 0
+        self.pending = None
+        self.cancel_event = threading.Event()
+        self.condition = threading.Condition()
+        
+        thread = threading.Thread(target=self.run)
+        thread.daemon = True
+        thread.start()
+    
+    def ask(self, question, index):
+        """Queue a question, superseding the previous one; returns its request id"""
+        with self.condition:
+            self.cancel_event.set()
+            self.cancel_event = threading.Event()
+            self.request_id += 1
+            self.pending = (self.request_id, question, index, self.cancel_event)
+            self.condition.notify()
+        return self.request_id
+    
+    def run(self):
+        while True:
+            with self.condition:
+                while self.pending is None:
+                    self.condition.wait()
+                request_id, question, index, cancel_event = self.pending
+                self.pending = None
+            
+            deadline = time.monotonic() + self.time_budget if self.time_budget else None
+            try:
+                response = self.engine.generate_response(question, index, deadline, cancel_event)
+            except Exception as e:
+                response = f"Sorry, something went wrong while answering: {str(e)}"
+            
+            if not cancel_event.is_set():
+                self.results.put((request_id, response))
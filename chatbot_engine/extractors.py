@@ -0,0 +1,255 @@
+import os
+import posixpath
+import importlib.util
+
+from .metrics import metrics
+
+def module_available(name):
+    """Check for an optional dependency without paying for its import"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+# Optional backends, imported only when a document of that type is read, as
+# are zipfile and ElementTree for slides. python-pptx is only needed to write
+# presentations; slides are read without it.
+PDF_AVAILABLE = module_available('PyPDF2')
+PPTX_AVAILABLE = module_available('pptx')
+
+def extract_pdf_page_range(file_path, start, stop):
+    """Extract pages [start, stop) of a PDF; runs inside a worker process"""
+    import PyPDF2
+    
+    with open(file_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        return [pdf_reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+def iter_pdf_pages(file_path, workers=None, pages_per_chunk=16):
+    """Yield (page_number, page_count, text) for each page, in page order
+    
+    Page ranges are extracted in parallel by a process pool, so the first pages
+    are available while later ranges are still being worked on. Small documents
+    are extracted in-process to avoid the pool start-up cost.
+    """
+    import PyPDF2
+    
+    with open(file_path, 'rb') as file:
+        page_count = len(PyPDF2.PdfReader(file).pages)
+    
+    if workers is None:
+        workers = os.cpu_count() or 1
+    
+    if page_count <= pages_per_chunk or workers < 2:
+        for start in range(0, page_count, pages_per_chunk):
+            stop = min(start + pages_per_chunk, page_count)
+            for offset, text in enumerate(extract_pdf_page_range(file_path, start, stop)):
+                yield start + offset + 1, page_count, text
+        return
+    
+    from concurrent.futures import ProcessPoolExecutor
+    
+    pool = ProcessPoolExecutor(max_workers=workers)
+    futures = []
+    try:
+        for start in range(0, page_count, pages_per_chunk):
+            stop = min(start + pages_per_chunk, page_count)
+            futures.append((start, pool.submit(extract_pdf_page_range, file_path, start, stop)))
+        
+        for start, future in futures:
+            for offset, text in enumerate(future.result()):
+                yield start + offset + 1, page_count, text
+    finally:
+        # Drop queued ranges if the consumer stopped early
+        for start, future in futures:
+            future.cancel()
+        pool.shutdown(wait=False)
+
+# Namespaces of the PresentationML parts read by the PPTX extractor
+P_NS = '{http://schemas.openxmlformats.org/presentationml/2006/main}'
+A_NS = '{http://schemas.openxmlformats.org/drawingml/2006/main}'
+R_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+# Placeholders on a notes page that repeat the slide rather than hold notes
+NOTES_SKIPPED_PLACEHOLDERS = {'sldImg', 'sldNum', 'dt', 'hdr', 'ftr'}
+
+def read_relationships(archive, part):
+    """Map relationship ids of a package part to (type, target part name)"""
+    from xml.etree import ElementTree
+    
+    folder, name = posixpath.split(part)
+    rels_part = posixpath.join(folder, '_rels', name + '.rels')
+    try:
+        root = ElementTree.fromstring(archive.read(rels_part))
+    except KeyError:
+        return {}
+    
+    relationships = {}
+    for rel in root.iter(REL_NS + 'Relationship'):
+        if rel.get('TargetMode') == 'External':
+            continue
+        target = rel.get('Target', '')
+        if target.startswith('/'):
+            target = target.lstrip('/')
+        else:
+            target = posixpath.normpath(posixpath.join(folder, target))
+        relationships[rel.get('Id')] = (rel.get('Type', ''), target)
+    return relationships
+
+def pptx_slide_parts(archive):
+    """Part names of the slides of a PPTX archive, in presentation order"""
+    from xml.etree import ElementTree
+    
+    relationships = read_relationships(archive, 'ppt/presentation.xml')
+    root = ElementTree.fromstring(archive.read('ppt/presentation.xml'))
+    
+    parts = []
+    for slide_id in root.iter(P_NS + 'sldId'):
+        rel = relationships.get(slide_id.get(R_NS + 'id'))
+        if rel is not None and rel[1] in archive.NameToInfo:
+            parts.append(rel[1])
+    return parts
+
+def paragraph_text(paragraph):
+    pieces = []
+    for element in paragraph.iter():
+        if element.tag == A_NS + 't':
+            pieces.append(element.text or '')
+        elif element.tag == A_NS + 'br':
+            pieces.append('\n')
+    return ''.join(pieces)
+
+def iter_shape_texts(stream, skipped_placeholders=()):
+    """Yield the text of each shape in a slide part, in document order
+    
+    The XML is read incrementally and each shape is discarded once its text
+    is taken, so only one shape is held in memory at a time. Shapes inside
+    groups are included, and tables give one line per row with cells
+    separated by ' | '.
+    """
+    from xml.etree import ElementTree
+    
+    for event, element in ElementTree.iterparse(stream):
+        if element.tag == P_NS + 'sp':
+            placeholder = element.find(f'{P_NS}nvSpPr/{P_NS}nvPr/{P_NS}ph')
+            if placeholder is None or placeholder.get('type', 'obj') not in skipped_placeholders:
+                text = '\n'.join(paragraph_text(p) for p in element.iter(A_NS + 'p'))
+                if text.strip():
+                    yield text
+            element.clear()
+        
+        elif element.tag == P_NS + 'graphicFrame':
+            rows = []
+            for row in element.iter(A_NS + 'tr'):
+                cells = ['\n'.join(paragraph_text(p) for p in cell.iter(A_NS + 'p')).strip()
+                         for cell in row.iter(A_NS + 'tc')]
+                if any(cells):
+                    rows.append(' | '.join(cell for cell in cells if cell))
+            if rows:
+                yield '\n'.join(rows)
+            element.clear()
+
+def extract_pptx_slide(archive, slide_part, include_notes=True):
+    """Text of one slide, its notes following its shapes"""
+    with archive.open(slide_part) as stream:
+        texts = [text + "\n" for text in iter_shape_texts(stream)]
+    
+    if include_notes:
+        for rel_type, target in read_relationships(archive, slide_part).values():
+            if rel_type.endswith('/notesSlide') and target in archive.NameToInfo:
+                with archive.open(target) as stream:
+                    texts.extend(text + "\n" for text in iter_shape_texts(stream, NOTES_SKIPPED_PLACEHOLDERS))
+    return ''.join(texts)
+
+def extract_pptx_slide_range(file_path, start, stop, include_notes=True):
+    """Extract slides [start, stop) of a PPTX; runs inside a worker process"""
+    import zipfile
+    
+    with zipfile.ZipFile(file_path) as archive:
+        parts = pptx_slide_parts(archive)
+        return [extract_pptx_slide(archive, part, include_notes) for part in parts[start:stop]]
+
+def iter_pptx_slides(file_path, workers=None, slides_per_chunk=32, include_notes=True):
+    """Yield (slide_number, slide_count, text) for each slide, in order
+    
+    Slide XML is streamed straight from the archive instead of building the
+    python-pptx object model, so reading needs no optional dependency. The
+    text covers text boxes, placeholders, grouped shapes, tables and, with
+    include_notes, the speaker notes. Like PDF pages, slide ranges of large
+    decks are extracted by a process pool and yielded in order as they finish.
+    """
+    import zipfile
+    
+    if workers is None:
+        workers = os.cpu_count() or 1
+    
+    with zipfile.ZipFile(file_path) as archive:
+        parts = pptx_slide_parts(archive)
+        slide_count = len(parts)
+        if slide_count <= slides_per_chunk or workers < 2:
+            for number, part in enumerate(parts, 1):
+                yield number, slide_count, extract_pptx_slide(archive, part, include_notes)
+            return
+    
+    from concurrent.futures import ProcessPoolExecutor
+    
+    pool = ProcessPoolExecutor(max_workers=workers)
+    futures = []
+    try:
+        for start in range(0, slide_count, slides_per_chunk):
+            stop = min(start + slides_per_chunk, slide_count)
+            futures.append((start, pool.submit(extract_pptx_slide_range, file_path, start, stop, include_notes)))
+        
+        for start, future in futures:
+            for offset, text in enumerate(future.result()):
+                yield start + offset + 1, slide_count, text
+    finally:
+        for start, future in futures:
+            future.cancel()
+        pool.shutdown(wait=False)
+
+def iter_txt_chunks(file_path, chunk_size=1024 * 1024):
+    """Yield the text of a TXT file in chunks of chunk_size characters
+    
+    The index carries sentences split across chunks over to the next one, so
+    a file of any size is indexed as it is read, holding one chunk at a time.
+    """
+    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+def is_supported(extension):
+    if extension in ('.txt', '.pptx'):
+        return True
+    if extension == '.pdf':
+        return PDF_AVAILABLE
+    return False
+
+def iter_document_pages(file_path, workers=None):
+    """Yield (number, count, text) pages whose texts join into the document"""
+    extension = os.path.splitext(file_path)[1].lower()
+    
+    if extension == '.txt':
+        for text in metrics.timed_iter('extract_txt_text', iter_txt_chunks(file_path)):
+            yield 1, 1, text
+    
+    elif extension == '.pdf':
+        try:
+            # Timed per page as it reaches this process, wherever it was extracted
+            for number, count, text in metrics.timed_iter('extract_pdf_text', iter_pdf_pages(file_path, workers)):
+                yield number, count, text + "\n"
+        except Exception as e:
+            raise Exception(f"PDF extraction error: {str(e)}")
+    
+    elif extension == '.pptx':
+        try:
+            yield from metrics.timed_iter('extract_pptx_text', iter_pptx_slides(file_path, workers))
+        except Exception as e:
+            raise Exception(f"PPTX extraction error: {str(e)}")
+    
+    else:
+        raise ValueError(f"Cannot process {extension} files")
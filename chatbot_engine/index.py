@@ -0,0 +1,609 @@
+import re
+import math
+import mmap
+import hashlib
+import itertools
+import tempfile
+import threading
+from array import array
+from collections import Counter, defaultdict
+
+class DocumentStore:
+    """Document text kept in a memory-mapped UTF-8 file, sliced lazily by sentence
+    
+    Sentences are addressed by [start, end) byte spans held in two array('Q')
+    tables, so the heap cost is 16 bytes per sentence whatever the document
+    size. A store either wraps an existing buffer, such as a cache entry, or
+    starts as an anonymous temporary file that text is appended to while a
+    document loads; the mapping grows as readers reach past its end.
+    """
+    
+    def __init__(self, text=None, starts=None, ends=None):
+        self.lock = threading.Lock()
+        if text is None:
+            self.file = tempfile.TemporaryFile()
+            self.size = 0
+            self.view = None
+            self.starts = array('Q')
+            self.ends = array('Q')
+        else:
+            self.file = None
+            self.size = len(text)
+            self.view = text
+            self.starts = starts
+            self.ends = ends
+    
+    def append_text(self, text):
+        """Append text to a growing store; returns the byte offset it starts at"""
+        data = text.encode('utf-8', 'surrogatepass')
+        with self.lock:
+            start = self.size
+            self.file.write(data)
+            self.size += len(data)
+        return start
+    
+    def remap(self):
+        with self.lock:
+            self.file.flush()
+            if self.size:
+                self.view = memoryview(mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ))
+            else:
+                self.view = memoryview(b'')
+        return self.view
+    
+    def bytes_view(self, start=0, end=None):
+        end = self.size if end is None else end
+        view = self.view
+        if view is None or end > len(view):
+            view = self.remap()
+        return view[start:end]
+    
+    def read(self, start=0, end=None):
+        return str(self.bytes_view(start, end), 'utf-8', 'surrogatepass')
+    
+    def __len__(self):
+        return len(self.ends)
+    
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        return self.read(self.starts[i], self.ends[i])
+    
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+class CompactPostings:
+    """Inverted index holding each term's postings as a flat array('I')
+    
+    Postings are stored as sentence_id, tf pairs, about 8 bytes each instead
+    of a tuple per posting, for documents too large to index as Python objects.
+    """
+    
+    def __init__(self):
+        self.arrays = {}
+    
+    def add(self, term, sentence_id, tf):
+        postings = self.arrays.get(term)
+        if postings is None:
+            postings = self.arrays[term] = array('I')
+        postings.append(sentence_id)
+        postings.append(tf)
+    
+    def get(self, term, default=None):
+        postings = self.arrays.get(term)
+        if postings is None:
+            return default
+        return list(zip(postings[0::2], postings[1::2]))
+    
+    def __getitem__(self, term):
+        return self.get(term, [])
+    
+    def __iter__(self):
+        return iter(list(self.arrays))
+    
+    def __len__(self):
+        return len(self.arrays)
+    
+    def __contains__(self, term):
+        return term in self.arrays
+
+class DocumentIndex:
+    """Pre-processed view of a document, built once and shared by every question
+    
+    The index can be built in one go from a string, or fed incrementally while
+    a document is still being extracted: feed() indexes every sentence that is
+    complete so far, and finish() flushes the trailing fragment. Each sentence
+    records its [start, end) span in the underlying text and the page (or
+    slide) it starts on.
+    
+    Given a DocumentStore, the text is written to the store instead of being
+    kept on the heap: spans are then byte offsets into the store, sentences are
+    read back lazily, and postings are kept compact.
+    """
+    
+    # BM25 tuning parameters
+    k1 = 1.2
+    b = 0.75
+    
+    # Terminators count only before whitespace or the end of the text, so
+    # decimals, versions and domains such as 3.14 or example.com stay whole
+    sentence_end = re.compile(r'[.!?]+[\'"’”)\]]*(?=\s|$)')
+    next_text = re.compile(r'\S+')
+    word_before = re.compile(r'[\w.]+$')
+    paragraph_break = re.compile(r'\n[ \t\r\f\v]*\n')
+    
+    # Words whose trailing period does not end a sentence
+    abbreviations = frozenset([
+        'mr', 'mrs', 'ms', 'dr', 'prof', 'sr', 'jr', 'st', 'vs', 'cf', 'al', 'fig', 'figs', 'eq', 'no', 'nos',
+        'vol', 'pp', 'approx', 'dept', 'est', 'inc', 'ltd', 'co', 'corp', 'jan', 'feb', 'mar', 'apr', 'jun',
+        'jul', 'aug', 'sep', 'sept', 'oct', 'nov', 'dec'
+    ])
+    
+    # A fragment this long with no sentence end, as in logs, is split into lines
+    max_fragment = 64 * 1024
+    line_end = re.compile(r'\n+')
+    
+    def __init__(self, content="", store=None, name=""):
+        self.store = store
+        self.name = name
+        self.parts = []
+        self.char_count = 0
+        self.page = 1
+        self.paragraph = 0
+        self.break_pending = False
+        self.pending = ""
+        self.pending_start = 0
+        self.pending_page = 1
+        self.finished = False
+        self._content = None
+        self._content_parts = 0
+        self._fingerprint = None
+        self._fingerprint_chars = 0
+        self._fingerprint_lock = threading.Lock()
+        self._hasher = None
+        self._hashed = 0
+        self._summary = None
+        self._summary_key = None
+        # Arrays for the NumPy scoring backend, made on its first query
+        self._term_matrix = None
+        # Whitespace around the text so far, so stripped_length never rereads it
+        self.leading_space = 0
+        self.trailing_space = 0
+        self.has_text = False
+        
+        self.word_counts = array('I')
+        self.token_counts = array('I')
+        self.sentence_pages = array('I')
+        # Paragraph of each sentence; pages and blank lines start new ones
+        self.sentence_paragraphs = array('I')
+        self.total_tokens = 0
+        
+        if store is None:
+            self.sentences = []
+            self.sentence_starts = array('Q')
+            self.sentence_ends = array('Q')
+            self.tokens = []
+            # Inverted index: term -> [(sentence_id, term_frequency), ...] in sentence order
+            self.postings = defaultdict(list)
+        else:
+            self.sentences = store
+            self.sentence_starts = store.starts
+            self.sentence_ends = store.ends
+            self.tokens = None
+            self.postings = CompactPostings()
+        
+        if content:
+            self.feed(content)
+            self.finish()
+    
+    def __getstate__(self):
+        # Indexes are pickled back from corpus and batch worker processes; the
+        # lock and running hash can't be, so the fingerprint rehashes from the
+        # start if the text grows after unpickling. The NumPy scoring arrays
+        # are a cache and are rebuilt on the other side.
+        state = self.__dict__.copy()
+        state['_fingerprint_lock'] = None
+        state['_hasher'] = None
+        state['_hashed'] = 0
+        state['_term_matrix'] = None
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._fingerprint_lock = threading.Lock()
+    
+    @property
+    def content(self):
+        if self.store is not None:
+            return self.store.read()
+        # Keyed on the part count so a reader racing feed() never caches stale text
+        part_count = len(self.parts)
+        if self._content is None or self._content_parts != part_count:
+            self._content = ''.join(self.parts[:part_count])
+            self._content_parts = part_count
+        return self._content
+    
+    @property
+    def fingerprint(self):
+        """SHA-256 of the UTF-8 text, the same for a document however it was loaded"""
+        # Text only ever grows, so the character count tells when to rehash, and
+        # a running hash only needs the text added since the last time
+        char_count = self.char_count
+        if self._fingerprint is None or self._fingerprint_chars != char_count:
+            with self._fingerprint_lock:
+                if self._hasher is None:
+                    self._hasher = hashlib.sha256()
+                    self._hashed = 0
+                if self.store is not None:
+                    # Hashed up to a byte offset
+                    size = self.store.size
+                    self._hasher.update(self.store.bytes_view(self._hashed, size))
+                    self._hashed = size
+                else:
+                    # Hashed up to a part count
+                    parts = self.parts[self._hashed:]
+                    for part in parts:
+                        self._hasher.update(part.encode('utf-8', 'surrogatepass'))
+                    self._hashed += len(parts)
+                self._fingerprint = self._hasher.copy().hexdigest()
+                self._fingerprint_chars = char_count
+        return self._fingerprint
+    
+    @property
+    def stripped_length(self):
+        if not self.has_text:
+            return 0
+        return self.char_count - self.leading_space - self.trailing_space
+    
+    def prefix(self, length):
+        """The first length characters of the text, without reading the rest"""
+        if self.store is not None:
+            # A character is at most 4 bytes; a character cut at the end is dropped
+            return str(self.store.bytes_view(0, min(self.store.size, length * 4)), 'utf-8', 'ignore')[:length]
+        pieces = []
+        remaining = length
+        for part in self.parts:
+            if remaining <= 0:
+                break
+            pieces.append(part[:remaining])
+            remaining -= len(part)
+        return ''.join(pieces)
+    
+    @property
+    def avg_length(self):
+        return self.total_tokens / len(self.token_counts) if self.token_counts else 0
+    
+    def feed(self, text, page=None):
+        """Index every sentence completed by this chunk of text"""
+        if page is not None and page != self.page:
+            # Sentences never run across pages or slides, so each is cited to its own
+            if self.pending:
+                self.split_sentences(self.pending, len(self.pending), final=True)
+            self.page = page
+        if self.store is not None:
+            self.store.append_text(text)
+        else:
+            self.parts.append(text)
+        self.char_count += len(text)
+        self.track_space(text)
+        
+        # The last piece may continue in the next chunk, so keep it pending
+        self.split_sentences(self.pending + text, len(self.pending), final=False)
+        if len(self.pending) > self.max_fragment:
+            self.split_sentences(self.pending, len(self.pending), final=False, boundary=self.line_end)
+            if len(self.pending) > self.max_fragment:
+                self.split_sentences(self.pending, len(self.pending), final=True)
+    
+    def track_space(self, text):
+        stripped = text.rstrip()
+        if not stripped:
+            self.trailing_space += len(text)
+            if not self.has_text:
+                self.leading_space += len(text)
+            return
+        self.trailing_space = len(text) - len(stripped)
+        if not self.has_text:
+            self.leading_space += len(text) - len(text.lstrip())
+            self.has_text = True
+    
+    def finish(self):
+        """Index the trailing fragment once no more text will arrive"""
+        self.split_sentences(self.pending, len(self.pending), final=True)
+        self.finished = True
+    
+    def append(self, text, separator="\n\n"):
+        """Add text to a finished document, indexing only the new sentences
+        
+        Term statistics are updated as the new sentences are added and the
+        summary is only recomputed if the new text can change it, so the cost
+        is proportional to the text added. Position bonuses depend on the
+        sentence id alone and are unaffected.
+        """
+        if self.char_count:
+            text = separator + text
+        self.finished = False
+        self.feed(text)
+        self.finish()
+    
+    def find_sentence_ends(self, buffer, final):
+        """(end, next start) of each sentence in buffer
+        
+        A single period after an abbreviation or an initialism such as e.g.
+        or U.S., or followed by a lowercase word, does not end a sentence, and
+        neither does one after a capital initial inside a name, as in John F.
+        Kennedy or J. R. Smith. Closing quotes and brackets stay with the
+        sentence they end. Unless final, a terminator whose next word is not
+        complete yet is left for the next chunk to decide.
+        """
+        ends = []
+        sentence_start = 0
+        for match in self.sentence_end.finditer(buffer):
+            start, end = match.span()
+            following = self.next_text.search(buffer, end)
+            if not final and (following is None or following.end() == len(buffer)):
+                break
+            
+            if buffer[start] == '.' and (end == start + 1 or buffer[start + 1] != '.'):
+                if following is not None and following.group()[0].islower():
+                    continue
+                word = self.word_before.search(buffer, max(0, start - 32), start)
+                if word is not None:
+                    word = word.group()
+                    if word.lower() in self.abbreviations:
+                        continue
+                    if '.' in word and all(len(part) <= 1 for part in word.split('.')) and not word.isdigit():
+                        continue
+                    if len(word) == 1 and self.is_initial(buffer, sentence_start, start - 1, following):
+                        continue
+            
+            # The terminator itself is left out, unless quotes or brackets close after it
+            ends.append((end if end - start > len(match.group().rstrip('\'"’”)]')) else start, end))
+            sentence_start = end
+        return ends
+    
+    def is_initial(self, buffer, sentence_start, position, following):
+        """Whether the letter at position, followed by a period, is an initial in a name
+        
+        It must be a capital followed by a capitalized word, and either come
+        after a capitalized word of the same sentence or be followed by
+        another initial.
+        """
+        if not buffer[position].isupper() or following is None or not following.group()[0].isupper():
+            return False
+        if len(following.group()) == 2 and following.group()[1] == '.':
+            return True
+        before = buffer[max(sentence_start, position - 64):position].split()
+        return bool(before) and before[-1][0].isupper()
+    
+    def split_sentences(self, buffer, carried, final, boundary=None):
+        """Index the sentences in buffer, whose first carried characters were pending
+        
+        Sentences end where find_sentence_ends says, or at the given boundary
+        pattern.
+        """
+        # Spans are measured in characters, or in UTF-8 bytes for a store
+        if self.store is None or buffer.isascii():
+            measure = len
+        else:
+            measure = lambda text: len(text.encode('utf-8', 'surrogatepass'))
+        
+        char_pos = 0
+        offset = self.pending_start
+        piece_start = 0
+        if boundary is None:
+            ends = self.find_sentence_ends(buffer, final)
+        else:
+            ends = [match.span() for match in boundary.finditer(buffer)]
+        if final:
+            ends.append((len(buffer), len(buffer)))
+        
+        for piece_end, next_start in ends:
+            piece = buffer[piece_start:piece_end]
+            sentence = piece.strip()
+            if len(sentence) > 15:
+                sentence_start = piece_start + len(piece) - len(piece.lstrip())
+                page = self.pending_page if sentence_start < carried else self.page
+                if self.sentence_pages and (self.break_pending or page != self.sentence_pages[-1] or
+                                            self.paragraph_break.search(buffer, char_pos, sentence_start)):
+                    self.paragraph += 1
+                self.break_pending = False
+                offset += measure(buffer[char_pos:sentence_start])
+                start = offset
+                offset += measure(sentence)
+                char_pos = sentence_start + len(sentence)
+                self.add_sentence(sentence, start, offset, page)
+            piece_start = next_start
+        
+        # A blank line in text consumed without a sentence still separates paragraphs
+        if self.paragraph_break.search(buffer, char_pos, piece_start):
+            self.break_pending = True
+        offset += measure(buffer[char_pos:piece_start])
+        self.pending = buffer[piece_start:]
+        self.pending_start = offset
+        if piece_start >= carried:
+            self.pending_page = self.page
+    
+    def add_sentence(self, sentence, start, end, page=1):
+        i = len(self.sentence_ends)
+        tokens = re.findall(r'\w+', sentence.lower())
+        
+        # Per-sentence data first, postings last, so a reader on another
+        # thread never sees a posting for a sentence that is not there yet
+        self.word_counts.append(len(sentence.split()))
+        self.token_counts.append(len(tokens))
+        self.sentence_pages.append(page)
+        self.sentence_paragraphs.append(self.paragraph)
+        self.total_tokens += len(tokens)
+        self.sentence_starts.append(start)
+        if self.store is None:
+            self.tokens.append(tokens)
+            self.sentences.append(sentence)
+        self.sentence_ends.append(end)
+        
+        if self.store is None:
+            for term, tf in Counter(tokens).items():
+                self.postings[term].append((i, tf))
+        else:
+            for term, tf in Counter(tokens).items():
+                self.postings.add(term, i, tf)
+    
+    def __len__(self):
+        return len(self.sentences)
+    
+    def location(self, sentence_id):
+        """(source name, page) a sentence comes from"""
+        return self.name, self.sentence_pages[sentence_id]
+    
+    def sentence_tokens(self, sentence_id):
+        if self.tokens is None:
+            return re.findall(r'\w+', self.sentences[sentence_id].lower())
+        return self.tokens[sentence_id]
+    
+    def position_bonus(self, sentence_id):
+        """Position bonus for the first 20 sentences"""
+        return (20 - sentence_id) * 0.1 if sentence_id < 20 else 0
+    
+    def position_bonuses(self):
+        """(sentence_id, bonus) for every sentence with a position bonus"""
+        return [(i, self.position_bonus(i)) for i in range(min(20, len(self.sentence_ends)))]
+    
+    def summarize(self):
+        """Pick the three most informative of the first 15 sentences"""
+        # Once 15 candidates are found, text added later can't change the summary,
+        # so the key is dropped; until then it is the text size it was made for
+        key = (len(self.sentences), self.char_count)
+        if self._summary is not None and self._summary_key in (None, key):
+            return self._summary
+        
+        sentences = list(itertools.islice((s for s in self.sentences if len(s) > 20), 15))
+        self._summary = self.pick_summary(sentences)
+        self._summary_key = None if len(sentences) == 15 else key
+        return self._summary
+    
+    def pick_summary(self, sentences):
+        """Summary text from the leading candidate sentences"""
+        if len(sentences) < 3:
+            return self.prefix(500)
+        
+        scored = []
+        for i, sent in enumerate(sentences):
+            score = len(sent.split()) * (1 - i * 0.05)
+            scored.append({'text': sent, 'score': score})
+        
+        scored.sort(key=lambda x: x['score'], reverse=True)
+        top_sentences = [s['text'] for s in scored[:3]]
+        return '. '.join(top_sentences) + '.'
+    
+    def idf(self, term):
+        """BM25 inverse document frequency, treating each sentence as a document"""
+        n = len(self.token_counts)
+        df = len(self.postings.get(term, ()))
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+    
+    def bm25(self, idf, tf, sentence_id):
+        """BM25 weight of a term occurring tf times in a sentence"""
+        length_norm = 1 - self.b + self.b * self.token_counts[sentence_id] / self.avg_length
+        return idf * tf * (self.k1 + 1) / (tf + self.k1 * length_norm)
+    
+    def has_phrase(self, sentence_id, phrase_tokens):
+        """Check that the phrase tokens appear at consecutive positions"""
+        tokens = self.sentence_tokens(sentence_id)
+        n = len(phrase_tokens)
+        first = phrase_tokens[0]
+        for pos in range(len(tokens) - n + 1):
+            if tokens[pos] == first and tokens[pos:pos + n] == phrase_tokens:
+                return True
+        return False
+
+class MappedPostings:
+    """Inverted index over memory-mapped arrays, looked up by binary search
+    
+    Terms are stored sorted by their UTF-8 bytes in one string table, so no
+    per-term Python objects are created until a term is actually queried.
+    """
+    
+    def __init__(self, term_blob, term_offsets, posting_offsets, sentence_ids, frequencies):
+        self.term_blob = term_blob
+        self.term_offsets = term_offsets
+        self.posting_offsets = posting_offsets
+        self.sentence_ids = sentence_ids
+        self.frequencies = frequencies
+    
+    def __len__(self):
+        return len(self.term_offsets) - 1
+    
+    def term(self, i):
+        return bytes(self.term_blob[self.term_offsets[i]:self.term_offsets[i + 1]])
+    
+    def find(self, term):
+        key = term.encode('utf-8', 'surrogatepass')
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.term(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(self) and self.term(lo) == key:
+            return lo
+        return -1
+    
+    def get(self, term, default=None):
+        i = self.find(term)
+        if i < 0:
+            return default
+        start, stop = self.posting_offsets[i], self.posting_offsets[i + 1]
+        return list(zip(self.sentence_ids[start:stop], self.frequencies[start:stop]))
+    
+    def __contains__(self, term):
+        return self.find(term) >= 0
+
+class MappedDocumentIndex(DocumentIndex):
+    """DocumentIndex backed by a cache file, opened without re-tokenizing anything
+    
+    Text, counts and postings are memoryviews over an mmap of the file, with
+    the text served through a DocumentStore, so opening is independent of
+    document size; text is only decoded for the sentences a question touches.
+    """
+    
+    def __init__(self, path, meta, sections):
+        self.path = path
+        self.meta = meta
+        self.name = meta['filename']
+        self.parts = []
+        self.pending = ""
+        self.finished = True
+        
+        self.char_count = meta['char_count']
+        self._fingerprint = meta.get('fingerprint')
+        self._fingerprint_chars = self.char_count
+        self._fingerprint_lock = threading.Lock()
+        self._hasher = None
+        self._term_matrix = None
+        self.store = DocumentStore(sections['text'], sections['sentence_starts'], sections['sentence_ends'])
+        self.sentence_starts = self.store.starts
+        self.sentence_ends = self.store.ends
+        self.sentences = self.store
+        self.tokens = None
+        self.word_counts = sections['word_counts']
+        self.token_counts = sections['token_counts']
+        self.sentence_pages = sections['sentence_pages']
+        self.sentence_paragraphs = sections['sentence_paragraphs']
+        self.total_tokens = meta['total_tokens']
+        self.postings = MappedPostings(
+            sections['term_blob'], sections['term_offsets'], sections['posting_offsets'],
+            sections['posting_sentence_ids'], sections['posting_frequencies'])
+    
+    @property
+    def stripped_length(self):
+        return self.meta['stripped_length']
+    
+    def feed(self, text):
+        raise ValueError("Cached document indexes are read-only")
+    
+    def append(self, text, separator="\n\n"):
+        raise ValueError("Cached document indexes are read-only")
+    
+    def summarize(self):
+        return self.meta['summary']
@@ -0,0 +1,250 @@
+import os
+import queue
+import threading
+
+from .index import DocumentIndex, DocumentStore
+from .corpus import DocumentCorpus
+from .extractors import is_supported, iter_document_pages
+from .metrics import metrics
+
+class DocumentLoader:
+    """Reads, extracts, indexes and summarizes documents on a worker thread
+    
+    Progress is posted as (load_id, stage, payload) tuples on a thread-safe
+    queue that the UI polls with root.after. Stages arrive in the order
+    'reading', 'extracting' (once per page or slide, or per megabyte read of
+    a text file), 'indexing', 'summarizing', and end with either 'done' or
+    'error'. Starting another load or calling cancel() abandons the one in
+    flight; its remaining events carry a stale load_id and can be ignored.
+    
+    With a DocumentCache, a file whose bytes were indexed before is opened
+    straight from the cache and goes from 'reading' directly to 'done'. One
+    that is not is cached once indexed, and 'done' carries the index reopened
+    from the cache, so the postings built on the heap are not kept.
+    Starting a load on a directory ingests every supported file in it into a
+    DocumentCorpus, with 'extracting' reported once per file. start_stored()
+    restores a document kept as text, as a SessionStore does, with the same
+    events.
+    """
+    
+    # Bump whenever extraction or indexing output changes, to invalidate caches
+    extractor_version = 7
+    
+    # Files larger than this are indexed into a memory-mapped DocumentStore
+    spill_threshold = 16 * 1024 * 1024
+    
+    def __init__(self, cache=None):
+        self.cache = cache
+        self.events = queue.Queue()
+        self.load_id = 0
+        self.cancel_event = threading.Event()
+    
+    def is_supported(self, extension):
+        return is_supported(extension)
+    
+    def start(self, file_path):
+        """Cancel any load in flight and start loading a file or a folder"""
+        self.cancel()
+        self.cancel_event = threading.Event()
+        
+        thread = threading.Thread(target=self.run, args=(self.load_id, file_path, self.cancel_event))
+        thread.daemon = True
+        thread.start()
+        return self.load_id
+    
+    def start_stored(self, fingerprint, read_document):
+        """Cancel any load in flight and start restoring a stored document
+        
+        read_document() returns its (name, content), or None if it is gone.
+        It runs on the worker thread, and only when the cache has no index
+        for the fingerprint.
+        """
+        self.cancel()
+        self.cancel_event = threading.Event()
+        
+        thread = threading.Thread(target=self.run_stored,
+                                  args=(self.load_id, fingerprint, read_document, self.cancel_event))
+        thread.daemon = True
+        thread.start()
+        return self.load_id
+    
+    def cancel(self):
+        self.cancel_event.set()
+        self.load_id += 1
+    
+    def corpus_files(self, directory):
+        """Supported files under directory, in a stable order"""
+        paths = []
+        for folder, subfolders, filenames in os.walk(directory):
+            subfolders.sort()
+            for filename in sorted(filenames):
+                if self.is_supported(os.path.splitext(filename)[1].lower()):
+                    paths.append(os.path.join(folder, filename))
+        return paths
+    
+    def iter_pages(self, file_path, workers=None):
+        """Yield (number, count, text) pages whose texts join into the document"""
+        return iter_document_pages(file_path, workers)
+    
+    def extract_text(self, file_path):
+        """Extract the whole document synchronously"""
+        return ''.join(text for number, count, text in self.iter_pages(file_path))
+    
+    def run(self, load_id, file_path, cancel_event):
+        def post(stage, payload=None):
+            self.events.put((load_id, stage, payload))
+        
+        try:
+            self.load(file_path, post, cancel_event)
+        except Exception as e:
+            post('error', {'filename': os.path.basename(os.path.normpath(file_path)), 'message': str(e)})
+    
+    def run_stored(self, load_id, fingerprint, read_document, cancel_event):
+        def post(stage, payload=None):
+            self.events.put((load_id, stage, payload))
+        
+        try:
+            self.load_stored(fingerprint, read_document, post, cancel_event)
+        except Exception as e:
+            post('error', {'filename': "stored document", 'message': str(e)})
+    
+    def load(self, file_path, post=None, cancel_event=None, key=None):
+        """Load a file or folder synchronously and return its index
+        
+        Stage events go to post(stage, payload) when given. Returns None if
+        cancel_event is set before loading completes; errors are raised. A
+        cache key computed by the caller, e.g. with key_for_bytes, saves
+        hashing the file again.
+        """
+        if post is None:
+            post = lambda stage, payload=None: None
+        if cancel_event is None:
+            cancel_event = threading.Event()
+        
+        if os.path.isdir(file_path):
+            return self.load_corpus(file_path, post, cancel_event)
+        
+        with metrics.timer('process_file'):
+            return self.load_file(file_path, post, cancel_event, key)
+    
+    def load_file(self, file_path, post, cancel_event, key):
+        """Load one file for load(), from the cache when possible"""
+        filename = os.path.basename(file_path)
+        
+        if self.cache is not None:
+            if key is None:
+                key = self.cache.key_for(file_path, self.extractor_version)
+            cached = self.cache.get(key)
+            metrics.count('document_cache.hits' if cached is not None else 'document_cache.misses')
+            if cached is not None:
+                post('reading', {'filename': filename, 'index': cached})
+                post('done', {'filename': filename, 'index': cached, 'summary': cached.summarize()})
+                return cached
+        
+        try:
+            size = os.path.getsize(file_path)
+        except OSError:
+            size = 0
+        index = DocumentIndex(store=DocumentStore() if size > self.spill_threshold else None, name=filename)
+        
+        # Text files arrive as one page in many chunks; report progress in megabytes
+        streamed = os.path.splitext(file_path)[1].lower() == '.txt'
+        megabytes = -(-size // (1024 * 1024)) if streamed else None
+        return self.build_index(index, self.iter_pages(file_path), post, cancel_event, key, megabytes)
+    
+    def load_stored(self, fingerprint, read_document, post=None, cancel_event=None):
+        """Restore a stored document synchronously and return its index
+        
+        The index is opened from the cache by fingerprint when it is there;
+        otherwise the text from read_document() is indexed in chunks, like a
+        text file, and cached for next time.
+        """
+        if post is None:
+            post = lambda stage, payload=None: None
+        if cancel_event is None:
+            cancel_event = threading.Event()
+        
+        key = None
+        if self.cache is not None:
+            key = self.cache.key_for_fingerprint(fingerprint, self.extractor_version)
+            cached = self.cache.get(key)
+            metrics.count('document_cache.hits' if cached is not None else 'document_cache.misses')
+            if cached is not None:
+                post('reading', {'filename': cached.name, 'index': cached})
+                post('done', {'filename': cached.name, 'index': cached, 'summary': cached.summarize()})
+                return cached
+        
+        stored = read_document()
+        if stored is None:
+            raise ValueError("The stored document could not be found")
+        name, content = stored
+        index = DocumentIndex(store=DocumentStore() if len(content) > self.spill_threshold else None, name=name)
+        
+        chunk_size = 1024 * 1024
+        pages = ((1, 1, content[start:start + chunk_size]) for start in range(0, len(content), chunk_size))
+        return self.build_index(index, pages, post, cancel_event, key, -(-len(content) // chunk_size))
+    
+    def build_index(self, index, pages, post, cancel_event, key, megabytes=None):
+        """Feed (number, count, text) pages into index, finish, summarize and cache it
+        
+        With megabytes, progress is reported per megabyte fed rather than per page.
+        """
+        filename = index.name
+        read = 0
+        
+        # The index is handed over straight away so questions can be answered
+        # from the pages extracted so far
+        post('reading', {'filename': filename, 'index': index})
+        
+        try:
+            for number, count, text in pages:
+                if cancel_event.is_set():
+                    return None
+                with metrics.timer('index.feed'):
+                    index.feed(text, page=number)
+                if megabytes is not None:
+                    read += len(text)
+                    post('extracting', {'filename': filename, 'page': read // (1024 * 1024), 'count': megabytes,
+                                        'unit': 'MB'})
+                else:
+                    post('extracting', {'filename': filename, 'page': number, 'count': count})
+            
+            post('indexing', {'filename': filename})
+            with metrics.timer('index.finish'):
+                index.finish()
+            
+            post('summarizing', {'filename': filename})
+            with metrics.timer('summarize'):
+                summary = index.summarize()
+        finally:
+            pages.close()
+        
+        if cancel_event.is_set():
+            return None
+        
+        if self.cache is not None:
+            self.cache.put(key, index, filename)
+            # Reopened from the cache, the postings are read from the mapped
+            # file and the ones built on the heap can be freed
+            mapped = self.cache.get(key)
+            if mapped is not None:
+                index = mapped
+        post('done', {'filename': filename, 'index': index, 'summary': summary})
+        return index
+    
+    def load_corpus(self, directory, post, cancel_event):
+        name = os.path.basename(os.path.normpath(directory))
+        corpus = DocumentCorpus(name)
+        post('reading', {'filename': name, 'index': corpus})
+        
+        def progress(done, total):
+            post('extracting', {'filename': name, 'page': done, 'count': total, 'unit': 'file'})
+        
+        corpus.ingest(self.corpus_files(directory), progress=progress, cancel_event=cancel_event)
+        if cancel_event.is_set():
+            return None
+        
+        post('indexing', {'filename': name})
+        post('summarizing', {'filename': name})
+        post('done', {'filename': name, 'index': corpus, 'summary': corpus.summarize()})
+        return corpus
@@ -0,0 +1,284 @@
+import re
+import time
+import heapq
+from collections import defaultdict
+
+from .understanding import ContextualUnderstanding
+from .extractors import module_available
+from .metrics import metrics
+
+# Optional scoring backend, imported on the first question it is used for
+NUMPY_AVAILABLE = module_available('numpy')
+
+class SemanticMatcher:
+    """Matches questions to content semantically
+    
+    Retrieval runs in two stages. The first scores every sentence sharing a
+    term with the question from the index alone and ranks passages: each
+    candidate with its neighbours in the same paragraph. The second reads
+    only the sentences of the best passages and re-ranks them on exact
+    phrases, how close the matched words are, and keywords found in the rest
+    of the passage.
+    
+    With NumPy installed, the first stage runs vectorized on documents of
+    vectorize_min_sentences or more, selecting the same sentences as the
+    pure-Python code; pass vectorized=False to always use the latter.
+    """
+    
+    # Sentences either side of a candidate that make up its passage
+    passage_radius = 1
+    # Weight of neighbouring sentences in a passage's score and context bonus
+    context_weight = 0.5
+    # Passages re-ranked for each result requested
+    passages_per_result = 4
+    # Below this many sentences the NumPy set-up costs more than it saves
+    vectorize_min_sentences = 2000
+    
+    def __init__(self, vectorized=None):
+        self.context_understanding = ContextualUnderstanding()
+        self.vectorized = NUMPY_AVAILABLE if vectorized is None else vectorized
+    
+    def phrase_tokens(self, phrases):
+        """(phrase, tokens) for each concept phrase with words in it, punctuation dropped"""
+        tokenized = []
+        for phrase in phrases:
+            phrase_tokens = re.findall(r'\w+', phrase)
+            if phrase_tokens:
+                tokenized.append((' '.join(phrase_tokens), phrase_tokens))
+        return tokenized
+    
+    def prepare_query(self, query_concepts, index):
+        """Tokenize query concepts and look up their BM25 idf once per question"""
+        phrases = self.phrase_tokens(query_concepts['phrases'])
+        idfs = {keyword: index.idf(keyword) for keyword in query_concepts['keywords']}
+        
+        return {
+            'keywords': query_concepts['keywords'],
+            'phrases': phrases,
+            'idfs': idfs
+        }
+    
+    def out_of_time(self, deadline, cancel_event):
+        """True once the response-time budget is spent or the query was superseded"""
+        if cancel_event is not None and cancel_event.is_set():
+            return True
+        return deadline is not None and time.monotonic() >= deadline
+    
+    def candidate_sentences(self, query, index, deadline=None, cancel_event=None):
+        """Collect term frequencies for sentences containing at least one query term"""
+        terms = set(query['keywords'])
+        for phrase, phrase_tokens in query['phrases']:
+            terms.update(phrase_tokens)
+        
+        candidates = defaultdict(dict)
+        for term in terms:
+            if self.out_of_time(deadline, cancel_event):
+                break
+            for sentence_id, tf in index.postings.get(term, ()):
+                candidates[sentence_id][term] = tf
+        
+        return candidates
+    
+    def neighbours(self, index, sentence_id):
+        """Sentences in the passage around sentence_id, excluding it"""
+        paragraphs = index.sentence_paragraphs
+        paragraph = paragraphs[sentence_id]
+        for j in range(max(0, sentence_id - self.passage_radius),
+                       min(len(paragraphs), sentence_id + self.passage_radius + 1)):
+            if j != sentence_id and paragraphs[j] == paragraph:
+                yield j
+    
+    def score_sentence(self, query, index, sentence_id, term_counts, matches=None, check_phrases=True):
+        """Compute how relevant a sentence is, optionally recording what matched
+        
+        Without check_phrases a phrase counts once all its words occur, which
+        needs no sentence text and never scores lower than the exact check.
+        """
+        score = 0
+        
+        # Check keywords: base match score plus BM25 weight
+        for keyword in query['keywords']:
+            tf = term_counts.get(keyword)
+            if tf:
+                score += 2
+                if matches is not None:
+                    matches.append(keyword)
+                score += index.bm25(query['idfs'][keyword], tf, sentence_id)
+        
+        # Check phrases (worth more)
+        for phrase, phrase_tokens in query['phrases']:
+            if all(t in term_counts for t in phrase_tokens) and (
+                    not check_phrases or index.has_phrase(sentence_id, phrase_tokens)):
+                score += 5
+                if matches is not None:
+                    matches.append(phrase)
+        
+        # Length consideration (not too short, not too long)
+        word_count = index.word_counts[sentence_id]
+        if 10 < word_count < 50:
+            score += 1
+        
+        return score
+    
+    def smallest_window(self, tokens, wanted):
+        """Length of the shortest run of tokens containing every word in wanted"""
+        counts = defaultdict(int)
+        covered = 0
+        best = len(tokens) + 1
+        left = 0
+        for right, token in enumerate(tokens):
+            if token not in wanted:
+                continue
+            counts[token] += 1
+            if counts[token] == 1:
+                covered += 1
+            while covered == len(wanted):
+                if tokens[left] in wanted:
+                    best = min(best, right - left + 1)
+                    counts[tokens[left]] -= 1
+                    if counts[tokens[left]] == 0:
+                        covered -= 1
+                left += 1
+        return best
+    
+    def proximity_bonus(self, query, index, sentence_id, term_counts):
+        """Reward matched keywords, and the words of each concept bigram, that sit close together"""
+        keywords = {keyword for keyword in query['keywords'] if keyword in term_counts}
+        phrases = [set(phrase_tokens) for phrase, phrase_tokens in query['phrases']
+                   if len(set(phrase_tokens)) > 1 and all(t in term_counts for t in phrase_tokens)]
+        if len(keywords) < 2 and not phrases:
+            return 0
+        
+        tokens = index.sentence_tokens(sentence_id)
+        bonus = 0
+        if len(keywords) > 1:
+            # At most one point per extra keyword, when they are adjacent
+            bonus += (len(keywords) - 1) * len(keywords) / self.smallest_window(tokens, keywords)
+        for words in phrases:
+            # Two points for a bigram in either order, fading as words come between
+            span = self.smallest_window(tokens, words)
+            if span <= len(words) + 2:
+                bonus += 2 * (len(words) - 1) / (span - 1)
+        return bonus
+    
+    def context_bonus(self, query, index, sentence_id, term_counts, candidates):
+        """Credit keywords the sentence lacks but the rest of its passage has"""
+        missing = {keyword for keyword in query['keywords'] if keyword not in term_counts}
+        found = set()
+        for j in self.neighbours(index, sentence_id):
+            neighbour = candidates.get(j)
+            if neighbour:
+                found.update(keyword for keyword in missing if keyword in neighbour)
+        return self.context_weight * len(found)
+    
+    def compute_semantic_score(self, query, index, sentence_id, term_counts, candidates=None):
+        """Build the full result for a sentence, including position bonus
+        
+        Given the candidates of the question, the second-stage proximity and
+        passage context bonuses are added too.
+        """
+        with metrics.timer('compute_semantic_score'):
+            matches = []
+            score = self.score_sentence(query, index, sentence_id, term_counts, matches)
+            score += index.position_bonus(sentence_id)
+            if candidates is not None:
+                score += self.proximity_bonus(query, index, sentence_id, term_counts)
+                score += self.context_bonus(query, index, sentence_id, term_counts, candidates)
+            return self.result_for(index, sentence_id, score, matches)
+    
+    def result_for(self, index, sentence_id, score, matches):
+        """The result dict for a scored sentence"""
+        source, page = index.location(sentence_id)
+        
+        return {
+            'id': sentence_id,
+            'score': score,
+            'matches': matches,
+            'text': index.sentences[sentence_id],
+            'source': source,
+            'page': page
+        }
+    
+    def find_relevant_content(self, question, index, top_n=5, deadline=None, cancel_event=None, analysis=None):
+        """Find most relevant content for the question
+        
+        deadline is a time.monotonic() value; when it passes, or cancel_event
+        is set, scoring stops and the best top_n found so far are returned.
+        An analysis from analyze_question can be passed in to avoid repeating it.
+        """
+        with metrics.timer('find_relevant_content'):
+            return self.rank_sentences(question, index, top_n, deadline, cancel_event, analysis)
+    
+    def rank_sentences(self, question, index, top_n, deadline, cancel_event, analysis):
+        """The body of find_relevant_content, split out so it can be timed as a whole"""
+        if analysis is None:
+            with metrics.timer('analyze_question'):
+                analysis = self.context_understanding.analyze_question(question)
+        concepts = analysis['concepts']
+        
+        if not index.sentences:
+            return [], analysis
+        
+        query = self.prepare_query(concepts, index)
+        limit = top_n * self.passages_per_result
+        if self.vectorized and len(index.sentence_ends) >= self.vectorize_min_sentences:
+            from .vectorized import select_passages
+            candidate_count, selected, candidates = select_passages(
+                self, query, index, limit, deadline, cancel_event)
+        else:
+            candidate_count, selected, candidates = self.select_passages(
+                query, index, limit, deadline, cancel_event)
+        metrics.count('candidate_sentences', candidate_count)
+        
+        # Stage 2: exact scores for the matching sentences of the best passages
+        with metrics.timer('find_relevant_content.rerank'):
+            results = [self.compute_semantic_score(query, index, i, candidates[i], candidates)
+                       for i in sorted(selected)]
+            # Stable, so equal scores keep favouring earlier sentences
+            results.sort(key=lambda result: result['score'], reverse=True)
+        return [result for result in results[:top_n] if result['score'] > 0], analysis
+    
+    def select_passages(self, query, index, limit, deadline, cancel_event):
+        """Stage 1: the sentences of the best passages, to be re-ranked
+        
+        Returns the number of candidate sentences, the ids to re-rank, and
+        the term counts of candidate sentences, covering at least those ids
+        and their neighbours.
+        """
+        # Only sentences sharing a term with the question are scored
+        with metrics.timer('find_relevant_content.candidates'):
+            candidates = self.candidate_sentences(query, index, deadline, cancel_event)
+        
+        # Estimate candidates from the index alone, then keep the best limit
+        # passages in a min-heap of (score, -sentence_id), so equal scores
+        # favour earlier sentences
+        with metrics.timer('find_relevant_content.scoring'):
+            estimates = {}
+            for n, i in enumerate(candidates):
+                if n % 256 == 255 and self.out_of_time(deadline, cancel_event):
+                    break
+                estimates[i] = (self.score_sentence(query, index, i, candidates[i], check_phrases=False) +
+                                index.position_bonus(i))
+            
+            heap = []
+            paragraphs = index.sentence_paragraphs
+            radius = self.passage_radius
+            for i, estimate in estimates.items():
+                if estimate <= 0:
+                    continue
+                # Only candidates add to the context, so look them up first
+                context = 0
+                for j in range(i - radius, i + radius + 1):
+                    if j != i and j in estimates and paragraphs[j] == paragraphs[i]:
+                        context += estimates[j]
+                entry = (estimate + self.context_weight * context, -i)
+                if len(heap) < limit:
+                    heapq.heappush(heap, entry)
+                elif entry > heap[0]:
+                    heapq.heapreplace(heap, entry)
+            
+            selected = set()
+            for score, neg_id in heap:
+                selected.add(-neg_id)
+                selected.update(j for j in self.neighbours(index, -neg_id) if estimates.get(j, 0) > 0)
+        return len(candidates), selected, candidates
@@ -0,0 +1,101 @@
+import json
+import time
+import tempfile
+import threading
+from array import array
+
+class Message:
+    """One chat turn, kept compact with __slots__"""
+    
+    __slots__ = ('role', 'text', 'created')
+    
+    def __init__(self, role, text, created=None):
+        self.role = role
+        self.text = text
+        self.created = time.time() if created is None else created
+    
+    @property
+    def timestamp(self):
+        return time.strftime("%H:%M", time.localtime(self.created))
+
+class MessageLog:
+    """Bounded store of chat messages, shared by every session that refers to them
+    
+    Messages get increasing sequence numbers and live in a ring buffer of
+    capacity records; sessions keep only the numbers, 8 bytes a turn. When
+    the ring is full the oldest message is dropped, or, with spill enabled,
+    written to an append-only file and read back from there on request.
+    spill may be True for an anonymous temporary file, or a path.
+    """
+    
+    def __init__(self, capacity=1000, spill=False):
+        if capacity < 1:
+            raise ValueError("A message log needs room for at least one message")
+        self.capacity = capacity
+        self.ring = [None] * capacity
+        self.first_seq = 0
+        self.next_seq = 0
+        self.lock = threading.Lock()
+        
+        if spill is True:
+            self.spill_file = tempfile.TemporaryFile()
+        elif spill:
+            self.spill_file = open(spill, 'w+b')
+        else:
+            self.spill_file = None
+        # Byte offsets in the spill file of messages spill_base up to first_seq
+        self.spill_base = 0
+        self.spill_offsets = array('Q')
+    
+    def __len__(self):
+        return self.next_seq - self.first_seq
+    
+    def append(self, role, text, created=None):
+        """Record a message and return its sequence number"""
+        message = Message(role, text, created)
+        with self.lock:
+            if self.next_seq - self.first_seq == self.capacity:
+                self.evict_oldest()
+            seq = self.next_seq
+            self.ring[seq % self.capacity] = message
+            self.next_seq += 1
+            return seq
+    
+    def evict_oldest(self):
+        slot = self.first_seq % self.capacity
+        message = self.ring[slot]
+        self.ring[slot] = None
+        if self.spill_file is not None:
+            self.spill_file.seek(0, 2)
+            self.spill_offsets.append(self.spill_file.tell())
+            record = {'role': message.role, 'text': message.text, 'created': message.created}
+            self.spill_file.write(json.dumps(record, ensure_ascii=False).encode('utf-8') + b'\n')
+        self.first_seq += 1
+    
+    def get(self, seq):
+        """The message with this sequence number, or None once it is gone"""
+        with self.lock:
+            if self.first_seq <= seq < self.next_seq:
+                return self.ring[seq % self.capacity]
+            if self.spill_base <= seq < self.spill_base + len(self.spill_offsets):
+                self.spill_file.seek(self.spill_offsets[seq - self.spill_base])
+                record = json.loads(self.spill_file.readline().decode('utf-8'))
+                return Message(record['role'], record['text'], record['created'])
+            return None
+    
+    def messages(self, seqs):
+        """Yield the messages still available for a sequence of numbers"""
+        for seq in seqs:
+            message = self.get(seq)
+            if message is not None:
+                yield message
+    
+    def clear(self):
+        with self.lock:
+            self.ring = [None] * self.capacity
+            self.first_seq = self.next_seq
+            if self.spill_file is not None:
+                self.spill_file.seek(0)
+                self.spill_file.truncate()
+                self.spill_base = self.first_seq
+                self.spill_offsets = array('Q')
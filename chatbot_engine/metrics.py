@@ -0,0 +1,195 @@
+import os
+import re
+import json
+import time
+import bisect
+import threading
+
+class NullTimer:
+    """Timer handed out while metrics are disabled; does nothing"""
+    
+    __slots__ = ()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+NULL_TIMER = NullTimer()
+
+class Timer:
+    """Context manager recording the time spent inside it under a name"""
+    
+    __slots__ = ('registry', 'name', 'start')
+    
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.registry.observe(self.name, time.perf_counter() - self.start)
+        return False
+
+class MetricsRegistry:
+    """In-process timers and counters for the loading and answering stages
+    
+    Disabled by default: timer() then returns a shared no-op context manager
+    and count() returns at once, so instrumented code pays one attribute
+    check per call. Enable with enable(), or for the shared registry by
+    setting CHATBOT_METRICS=1 in the environment.
+    
+    Timers keep a count, total, minimum, maximum and histogram buckets of
+    their durations in seconds. Everything can be dumped as JSON-able dicts
+    with snapshot() or as Prometheus text with to_prometheus(), and moved
+    between processes with drain() and merge().
+    """
+    
+    # Upper bounds, in seconds, of the timer histogram buckets
+    buckets = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 60.0)
+    
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.timers = {}
+        self.counters = {}
+    
+    def enable(self):
+        self.enabled = True
+    
+    def disable(self):
+        self.enabled = False
+    
+    def reset(self):
+        with self.lock:
+            self.timers = {}
+            self.counters = {}
+    
+    def timer(self, name):
+        """Context manager timing its body under name"""
+        if not self.enabled:
+            return NULL_TIMER
+        return Timer(self, name)
+    
+    def observe(self, name, seconds):
+        """Record one duration under name"""
+        if not self.enabled:
+            return
+        with self.lock:
+            timer = self.timers.get(name)
+            if timer is None:
+                timer = self.timers[name] = [0, 0.0, seconds, seconds, [0] * (len(self.buckets) + 1)]
+            timer[0] += 1
+            timer[1] += seconds
+            timer[2] = min(timer[2], seconds)
+            timer[3] = max(timer[3], seconds)
+            timer[4][bisect.bisect_left(self.buckets, seconds)] += 1
+    
+    def count(self, name, amount=1):
+        """Add amount to the counter name"""
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+    
+    def timed_iter(self, name, iterable):
+        """Iterate over iterable, timing each step under name
+        
+        Used around generators, so the time spent producing each item is
+        measured apart from the time the consumer spends on it.
+        """
+        if not self.enabled:
+            return iterable
+        return self.iter_timed(name, iterable)
+    
+    def iter_timed(self, name, iterable):
+        iterator = iter(iterable)
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    self.observe(name, time.perf_counter() - start)
+                yield item
+        finally:
+            close = getattr(iterator, 'close', None)
+            if close is not None:
+                close()
+    
+    # Export
+    
+    def drain(self):
+        """Return the raw state and reset it, for merging into another registry"""
+        with self.lock:
+            state = {'timers': self.timers, 'counters': self.counters}
+            self.timers = {}
+            self.counters = {}
+        return state
+    
+    def merge(self, state):
+        """Add the raw state drained from another registry"""
+        with self.lock:
+            for name, (count, total, low, high, buckets) in state['timers'].items():
+                timer = self.timers.get(name)
+                if timer is None:
+                    self.timers[name] = [count, total, low, high, list(buckets)]
+                    continue
+                timer[0] += count
+                timer[1] += total
+                timer[2] = min(timer[2], low)
+                timer[3] = max(timer[3], high)
+                timer[4] = [a + b for a, b in zip(timer[4], buckets)]
+            for name, value in state['counters'].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+    
+    def snapshot(self):
+        """Timers and counters as a JSON-able dict"""
+        with self.lock:
+            timers = {
+                name: {
+                    'count': count,
+                    'total_ms': total * 1000,
+                    'mean_ms': total / count * 1000,
+                    'min_ms': low * 1000,
+                    'max_ms': high * 1000
+                }
+                for name, (count, total, low, high, buckets) in sorted(self.timers.items())
+            }
+            counters = dict(sorted(self.counters.items()))
+        return {'enabled': self.enabled, 'timers': timers, 'counters': counters}
+    
+    def to_json(self, indent=2):
+        return json.dumps(self.snapshot(), indent=indent)
+    
+    def to_prometheus(self, prefix='chatbot'):
+        """Timers as one histogram labelled by stage, counters as <prefix>_<name>_total"""
+        lines = []
+        with self.lock:
+            if self.timers:
+                metric = f"{prefix}_stage_seconds"
+                lines.append(f"# HELP {metric} Time spent in each instrumented stage.")
+                lines.append(f"# TYPE {metric} histogram")
+                for name, (count, total, low, high, buckets) in sorted(self.timers.items()):
+                    cumulative = 0
+                    for bound, hits in zip(self.buckets + (float('inf'),), buckets):
+                        cumulative += hits
+                        le = '+Inf' if bound == float('inf') else repr(bound)
+                        lines.append(f'{metric}_bucket{{stage="{name}",le="{le}"}} {cumulative}')
+                    lines.append(f'{metric}_sum{{stage="{name}"}} {total!r}')
+                    lines.append(f'{metric}_count{{stage="{name}"}} {count}')
+            
+            for name, value in sorted(self.counters.items()):
+                metric = f"{prefix}_{re.sub(r'[^a-zA-Z0-9_]', '_', name)}_total"
+                lines.append(f"# TYPE {metric} counter")
+                lines.append(f"{metric} {value}")
+        return '\n'.join(lines) + '\n'
+
+# Registry the engine, loader and extractors report to
+metrics = MetricsRegistry(enabled=os.environ.get('CHATBOT_METRICS', '') not in ('', '0'))
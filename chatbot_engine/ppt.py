@@ -0,0 +1,168 @@
+import re
+from datetime import datetime
+
+class PPTContentGenerator:
+    """Generates structured PPT content from document"""
+    
+    def __init__(self):
+        pass
+    
+    def extract_key_points(self, text, num_points=5):
+        """Extract key points from text"""
+        sentences = [s.strip() for s in re.split(r'[.!?]+', text) if len(s.strip()) > 20]
+        
+        if not sentences:
+            return []
+        
+        scored = []
+        for i, sent in enumerate(sentences[:20]):
+            score = len(sent.split()) * (1 - i * 0.05)
+            scored.append({'text': sent, 'score': score})
+        
+        scored.sort(key=lambda x: x['score'], reverse=True)
+        return [s['text'] for s in scored[:num_points]]
+    
+    def extract_topics(self, text):
+        """Extract main topics from text"""
+        paragraphs = [p.strip() for p in text.split('\n\n') if len(p.strip()) > 50]
+        
+        if not paragraphs:
+            sentences = [s.strip() for s in re.split(r'[.!?]+', text) if len(s.strip()) > 30]
+            paragraphs = []
+            for i in range(0, len(sentences), 3):
+                paragraphs.append(' '.join(sentences[i:i+3]))
+        
+        topics = []
+        for para in paragraphs[:6]:
+            first_sent = re.split(r'[.!?]+', para)[0].strip()
+            words = first_sent.split()[:8]
+            topic_title = ' '.join(words)
+            
+            points = self.extract_key_points(para, num_points=3)
+            
+            topics.append({
+                'title': topic_title,
+                'content': para[:300],
+                'points': points[:3]
+            })
+        
+        return topics
+    
+    def create_title_from_content(self, text):
+        """Create a title from the content"""
+        first_sentences = re.split(r'[.!?]+', text)[:3]
+        common_words = {}
+        
+        for sent in first_sentences:
+            words = re.findall(r'\b[A-Z][a-z]+\b', sent)
+            for word in words:
+                common_words[word] = common_words.get(word, 0) + 1
+        
+        if common_words:
+            main_word = max(common_words, key=common_words.get)
+            return f"{main_word} Overview"
+        
+        return "Content Overview"
+    
+    def generate_slide_content(self, content_text):
+        """Generate 7-8 slides of content"""
+        if not content_text or len(content_text) < 100:
+            return None
+        
+        slides = []
+        
+        # Slide 1: Title Slide
+        title = self.create_title_from_content(content_text)
+        slides.append({
+            'type': 'title',
+            'title': title,
+            'subtitle': f'Generated from document content\n{datetime.now().strftime("%B %d, %Y")}'
+        })
+        
+        # Slide 2: Introduction/Overview
+        intro_sentences = self.extract_key_points(content_text[:1000], num_points=4)
+        slides.append({
+            'type': 'content',
+            'title': 'Introduction',
+            'bullets': intro_sentences
+        })
+        
+        # Slide 3-7: Topic slides
+        topics = self.extract_topics(content_text)
+        
+        for topic in topics[:5]:
+            slide_title = topic['title']
+            if len(slide_title) > 60:
+                slide_title = slide_title[:60] + "..."
+            
+            bullets = topic['points'] if topic['points'] else [topic['content'][:200]]
+            
+            slides.append({
+                'type': 'content',
+                'title': slide_title,
+                'bullets': bullets
+            })
+        
+        # Slide: Key Takeaways
+        all_sentences = [s.strip() for s in re.split(r'[.!?]+', content_text) if len(s.strip()) > 30]
+        key_takeaways = []
+        
+        for sent in all_sentences:
+            if any(word in sent.lower() for word in ['important', 'key', 'essential', 'critical', 'significant', 'main', 'primary']):
+                key_takeaways.append(sent)
+                if len(key_takeaways) >= 4:
+                    break
+        
+        if not key_takeaways:
+            key_takeaways = self.extract_key_points(content_text, num_points=4)
+        
+        slides.append({
+            'type': 'content',
+            'title': 'Key Takeaways',
+            'bullets': key_takeaways[:4]
+        })
+        
+        # Final Slide: Conclusion
+        slides.append({
+            'type': 'conclusion',
+            'title': 'Thank You',
+            'subtitle': 'Questions?'
+        })
+        
+        return slides
+    
+    def build_presentation(self, slides_content):
+        """Lay out generated slide content as a python-pptx Presentation"""
+        from pptx import Presentation
+        from pptx.util import Inches
+        
+        prs = Presentation()
+        prs.slide_width = Inches(10)
+        prs.slide_height = Inches(7.5)
+        
+        for slide_data in slides_content:
+            if slide_data['type'] == 'title':
+                slide = prs.slides.add_slide(prs.slide_layouts[0])
+                slide.shapes.title.text = slide_data['title']
+                if len(slide.shapes) > 1:
+                    slide.placeholders[1].text = slide_data['subtitle']
+            
+            elif slide_data['type'] == 'content':
+                slide = prs.slides.add_slide(prs.slide_layouts[1])
+                slide.shapes.title.text = slide_data['title']
+                
+                body_shape = slide.shapes.placeholders[1]
+                tf = body_shape.text_frame
+                
+                for bullet in slide_data['bullets']:
+                    p = tf.add_paragraph()
+                    p.text = bullet[:150]
+                    p.level = 0
+            
+            elif slide_data['type'] == 'conclusion':
+                slide = prs.slides.add_slide(prs.slide_layouts[0])
+                slide.shapes.title.text = slide_data['title']
+                if len(slide.shapes) > 1:
+                    slide.placeholders[1].text = slide_data['subtitle']
+        
+        return prs
@@ -0,0 +1,598 @@
+import io
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import shutil
+import asyncio
+import argparse
+import tempfile
+import threading
+from array import array
+from datetime import datetime
+from urllib.parse import urlsplit, parse_qs
+
+from .cache import DocumentCache
+from .loader import DocumentLoader
+from .index import MappedDocumentIndex
+from .engine import AdvancedResponseEngine, QueryCache, answer_record
+from .memory import MessageLog
+from .metrics import metrics
+from .ppt import PPTContentGenerator
+from .extractors import PPTX_AVAILABLE
+
+PPTX_MEDIA_TYPE = 'application/vnd.openxmlformats-officedocument.presentationml.presentation'
+
+class HTTPError(Exception):
+    """An error answered with an HTTP status and a JSON error message"""
+    
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class ScoringWorker:
+    """Per-process state of a scoring pool worker
+    
+    Indexes are opened from the shared DocumentCache by key, so each worker
+    maps the same cache files instead of receiving pickled copies.
+    """
+    
+    max_open = 32
+    
+    def __init__(self, cache_dir, deterministic=False):
+        self.cache = DocumentCache(cache_dir)
+        # Sessions keep their own history on the server side
+        self.engine = AdvancedResponseEngine(deterministic=deterministic, memory_size=0)
+        self.indexes = {}
+    
+    def open_index(self, key):
+        index = self.indexes.pop(key, None)
+        if index is None:
+            index = self.cache.get(key)
+            if index is None:
+                raise LookupError(key)
+            if len(self.indexes) >= self.max_open:
+                del self.indexes[next(iter(self.indexes))]
+        self.indexes[key] = index
+        return index
+    
+    def answer(self, key, question, time_budget):
+        index = self.open_index(key)
+        answer = self.engine.generate_answer(question, index, deadline=time.monotonic() + time_budget)
+        return answer_record(question, answer)
+
+scoring_worker = None
+
+def start_scoring_worker(cache_dir, deterministic=False, collect_metrics=False):
+    global scoring_worker
+    scoring_worker = ScoringWorker(cache_dir, deterministic)
+    if collect_metrics:
+        metrics.enable()
+
+def answer_in_worker(key, question, time_budget):
+    """Answer a question against a cached index; runs inside a pool worker
+    
+    Returns the answer record and, with metrics enabled, the timings and
+    counts it produced, for the server to merge into its own registry.
+    """
+    record = scoring_worker.answer(key, question, time_budget)
+    return record, metrics.drain() if metrics.enabled else None
+
+class Request:
+    """A parsed HTTP request"""
+    
+    def __init__(self, method, target, headers, body):
+        url = urlsplit(target)
+        self.method = method
+        self.path = url.path.rstrip('/') or '/'
+        self.query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        self.headers = headers
+        self.body = body
+    
+    @property
+    def content_type(self):
+        return self.headers.get('content-type', '').split(';')[0].strip().lower()
+    
+    def json(self):
+        try:
+            data = json.loads(self.body.decode('utf-8') or '{}')
+        except (UnicodeDecodeError, ValueError):
+            raise HTTPError(400, "Request body is not valid JSON")
+        if not isinstance(data, dict):
+            raise HTTPError(400, "Request body must be a JSON object")
+        return data
+
+class ChatbotServer:
+    """Local HTTP/JSON front end for the question answering engine
+    
+    Documents are loaded once into the shared DocumentCache and kept open by
+    key, so every session asking about the same bytes shares one index.
+    Scoring runs in a process pool whose workers map the cached indexes
+    themselves; with workers=0, or for documents that could not be cached,
+    questions are answered on a thread of this process instead. With
+    deterministic set, repeating a question about a document repeats the
+    answer word for word.
+    
+    Endpoints, all exchanging JSON unless noted:
+    
+        GET    /                      server status
+        GET    /documents             loaded documents
+        POST   /documents             upload raw file bytes (?filename=name.pdf),
+                                      or {"text": ..., "name": ...}, or
+                                      {"path": ...} when allow_paths is set
+        GET    /documents/<id>        document details and summary
+        DELETE /documents/<id>        forget a document
+        GET    /documents/<id>/summary
+        POST   /documents/<id>/ppt    generated presentation as .pptx bytes
+        POST   /ask                   {"document": id, "question": ...}
+        POST   /sessions              {"document": id}
+        GET    /sessions/<id>         session with its messages
+        DELETE /sessions/<id>
+        POST   /sessions/<id>/ask     {"question": ...}
+        GET    /metrics               stage timings as Prometheus text,
+                                      or JSON with ?format=json
+    
+    Stage timings are only collected once metrics are enabled, e.g. with
+    --metrics; scoring workers send theirs back with every answer.
+    """
+    
+    max_body = 256 * 1024 * 1024
+    
+    # Session messages kept in memory; older ones spill to a temporary file
+    message_capacity = 10000
+    
+    def __init__(self, host='127.0.0.1', port=8765, workers=None, cache=None,
+                 time_budget=1.5, allow_paths=False, deterministic=False):
+        self.host = host
+        self.port = port
+        self.cache = cache if cache is not None else DocumentCache()
+        self.loader = DocumentLoader(self.cache)
+        self.deterministic = deterministic
+        self.thread_state = threading.local()
+        self.query_cache = QueryCache()
+        self.ppt_generator = PPTContentGenerator()
+        self.time_budget = time_budget
+        self.allow_paths = allow_paths
+        self.workers = workers if workers is not None else os.cpu_count() or 1
+        self.pool = None
+        self.server = None
+        
+        self.documents = {}
+        self.loading = {}
+        self.sessions = {}
+        self.messages = MessageLog(self.message_capacity, spill=True)
+        
+        self.routes = [
+            ('GET', r'/', self.status),
+            ('GET', r'/documents', self.list_documents),
+            ('POST', r'/documents', self.upload_document),
+            ('GET', r'/documents/([^/]+)', self.get_document),
+            ('DELETE', r'/documents/([^/]+)', self.delete_document),
+            ('GET', r'/documents/([^/]+)/summary', self.get_summary),
+            ('POST', r'/documents/([^/]+)/ppt', self.generate_ppt),
+            ('POST', r'/ask', self.ask),
+            ('POST', r'/sessions', self.create_session),
+            ('GET', r'/sessions/([^/]+)', self.get_session),
+            ('DELETE', r'/sessions/([^/]+)', self.delete_session),
+            ('POST', r'/sessions/([^/]+)/ask', self.ask_in_session),
+            ('GET', r'/metrics', self.get_metrics),
+        ]
+        self.routes = [(method, re.compile(pattern + '$'), handler) for method, pattern, handler in self.routes]
+    
+    async def start(self):
+        if self.workers > 0:
+            from concurrent.futures import ProcessPoolExecutor
+            
+            self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=start_scoring_worker,
+                                            initargs=(self.cache.directory, self.deterministic, metrics.enabled))
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self.server
+    
+    async def serve_forever(self):
+        if self.server is None:
+            await self.start()
+        try:
+            await self.server.serve_forever()
+        finally:
+            await self.close()
+    
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+    
+    # HTTP
+    
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                
+                parts = request_line.decode('latin-1').split()
+                if len(parts) != 3:
+                    await self.write_response(writer, 400, {'error': "Malformed request line"}, keep_alive=False)
+                    break
+                method, target, version = parts
+                
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                
+                try:
+                    length = int(headers.get('content-length', 0))
+                except ValueError:
+                    length = -1
+                if length < 0 or length > self.max_body:
+                    status = 400 if length < 0 else 413
+                    await self.write_response(writer, status, {'error': "Bad or oversized request body"}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+                
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                status, payload, content_type, extra_headers = await self.dispatch(Request(method, target, headers, body))
+                await self.write_response(writer, status, payload, content_type, extra_headers, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+    
+    async def write_response(self, writer, status, payload, content_type='application/json',
+                             extra_headers=None, keep_alive=True):
+        if content_type == 'application/json':
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            content_type = 'application/json; charset=utf-8'
+        else:
+            body = payload
+        
+        reason = {200: 'OK', 201: 'Created', 400: 'Bad Request', 403: 'Forbidden', 404: 'Not Found',
+                  405: 'Method Not Allowed', 413: 'Payload Too Large', 415: 'Unsupported Media Type',
+                  422: 'Unprocessable Entity', 500: 'Internal Server Error',
+                  501: 'Not Implemented'}.get(status, '')
+        lines = [f"HTTP/1.1 {status} {reason}", f"Content-Type: {content_type}", f"Content-Length: {len(body)}",
+                 "Connection: keep-alive" if keep_alive else "Connection: close"]
+        for name, value in (extra_headers or {}).items():
+            lines.append(f"{name}: {value}")
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+        await writer.drain()
+    
+    async def dispatch(self, request):
+        """Route a request; returns (status, payload, content type, extra headers)"""
+        allowed = False
+        for method, pattern, handler in self.routes:
+            match = pattern.match(request.path)
+            if match is None:
+                continue
+            if method != request.method:
+                allowed = True
+                continue
+            
+            try:
+                result = await handler(request, *match.groups())
+            except HTTPError as e:
+                return e.status, {'error': str(e)}, 'application/json', None
+            except Exception as e:
+                return 500, {'error': str(e)}, 'application/json', None
+            
+            if len(result) == 2:
+                return result + ('application/json', None)
+            return result
+        
+        if allowed:
+            return 405, {'error': f"{request.method} not allowed on {request.path}"}, 'application/json', None
+        return 404, {'error': f"No such endpoint: {request.path}"}, 'application/json', None
+    
+    # Documents
+    
+    def document_info(self, document):
+        return {
+            'document': document['key'],
+            'name': document['name'],
+            'sentences': len(document['index']),
+            'characters': document['index'].char_count,
+            'summary': document['summary']
+        }
+    
+    def find_document(self, key):
+        if not isinstance(key, str):
+            raise HTTPError(400, "A 'document' id string is required")
+        document = self.documents.get(key)
+        if document is None:
+            raise HTTPError(404, f"No such document: {key}")
+        return document
+    
+    async def status(self, request):
+        return 200, {
+            'status': 'ok',
+            'documents': len(self.documents),
+            'sessions': len(self.sessions),
+            'workers': self.workers,
+            # Rankings cached in this process; pool workers keep their own
+            'query_cache': self.query_cache.stats()
+        }
+    
+    async def list_documents(self, request):
+        return 200, {'documents': [
+            {'document': document['key'], 'name': document['name']} for document in self.documents.values()
+        ]}
+    
+    async def upload_document(self, request):
+        if request.content_type == 'application/json':
+            data = request.json()
+            if 'path' in data:
+                return await self.ingest_path(data['path'])
+            text = data.get('text')
+            if not isinstance(text, str) or not text.strip():
+                raise HTTPError(400, "Send file bytes, or JSON with a non-empty 'text'")
+            name = os.path.basename(data.get('name') or 'Manual Input')
+            if not name.lower().endswith('.txt'):
+                name += '.txt'
+            content = text.encode('utf-8')
+        else:
+            name = os.path.basename(request.query.get('filename', ''))
+            content = request.body
+            if not name:
+                raise HTTPError(400, "Uploads need a ?filename= query parameter")
+        
+        extension = os.path.splitext(name)[1].lower()
+        if not self.loader.is_supported(extension):
+            raise HTTPError(415, f"Cannot process {extension or 'extensionless'} files")
+        
+        key = self.cache.key_for_bytes(content, self.loader.extractor_version)
+        document = await self.load_once(key, lambda: self.load_upload(name, content, key))
+        return 201, self.document_info(document)
+    
+    async def ingest_path(self, path):
+        if not self.allow_paths:
+            raise HTTPError(403, "Loading files by path is disabled on this server")
+        if not isinstance(path, str) or not os.path.isfile(path):
+            raise HTTPError(400, f"No such file: {path}")
+        if not self.loader.is_supported(os.path.splitext(path)[1].lower()):
+            raise HTTPError(415, f"Cannot process {os.path.splitext(path)[1] or 'extensionless'} files")
+        
+        loop = asyncio.get_running_loop()
+        key = await loop.run_in_executor(None, self.cache.key_for, path, self.loader.extractor_version)
+        document = await self.load_once(key, lambda: self.load_file(path, key))
+        return 201, self.document_info(document)
+    
+    async def load_once(self, key, load):
+        """Load a document unless it is loaded or loading already
+        
+        Requests for a document being loaded wait on a future that the
+        loading request always resolves: with the document, its error, or
+        cancellation if that request goes away first.
+        """
+        if key in self.documents:
+            return self.documents[key]
+        
+        loop = asyncio.get_running_loop()
+        future = self.loading.get(key)
+        if future is None:
+            future = self.loading[key] = loop.create_future()
+            try:
+                self.documents[key] = await loop.run_in_executor(None, load)
+                future.set_result(self.documents[key])
+            except Exception as e:
+                future.set_exception(e)
+                future.exception()  # Retrieved, so it is not logged when nobody waits
+                raise HTTPError(422, f"Error processing file: {str(e)}")
+            finally:
+                del self.loading[key]
+                if not future.done():
+                    future.cancel()
+            return self.documents[key]
+        
+        try:
+            # Shielded, so a waiter going away doesn't cancel it for the others
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                raise
+            # The request that was loading it went away; load it for this one
+            return await self.load_once(key, load)
+        except Exception as e:
+            raise HTTPError(422, f"Error processing file: {str(e)}")
+    
+    def load_upload(self, name, content, key):
+        directory = tempfile.mkdtemp(prefix='chatbot-upload-')
+        try:
+            path = os.path.join(directory, name)
+            with open(path, 'wb') as f:
+                f.write(content)
+            return self.load_file(path, key)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+    
+    def load_file(self, path, key):
+        index = self.loader.load(path, key=key)
+        
+        # Serve the memory-mapped cache entry, which pool workers share, rather
+        # than the index built on the heap
+        cached = self.cache.get(key)
+        if cached is not None:
+            index = cached
+        
+        return {
+            'key': key,
+            'name': os.path.basename(path),
+            'index': index,
+            'summary': index.summarize(),
+            'shared': isinstance(index, MappedDocumentIndex)
+        }
+    
+    async def get_document(self, request, key):
+        return 200, self.document_info(self.find_document(key))
+    
+    async def delete_document(self, request, key):
+        self.find_document(key)
+        del self.documents[key]
+        return 200, {'deleted': key}
+    
+    async def get_summary(self, request, key):
+        document = self.find_document(key)
+        return 200, {'document': key, 'summary': document['summary']}
+    
+    async def generate_ppt(self, request, key):
+        if not PPTX_AVAILABLE:
+            raise HTTPError(501, "PowerPoint generation requires python-pptx library.")
+        document = self.find_document(key)
+        
+        def build():
+            slides_content = self.ppt_generator.generate_slide_content(document['index'].content)
+            if not slides_content:
+                return None
+            buffer = io.BytesIO()
+            self.ppt_generator.build_presentation(slides_content).save(buffer)
+            return buffer.getvalue()
+        
+        content = await asyncio.get_running_loop().run_in_executor(None, build)
+        if content is None:
+            raise HTTPError(422, "Need more content to generate a meaningful presentation.")
+        
+        filename = os.path.splitext(document['name'])[0] + '.pptx'
+        return 200, content, PPTX_MEDIA_TYPE, {'Content-Disposition': f'attachment; filename="{filename}"'}
+    
+    # Questions
+    
+    async def answer(self, document, question):
+        loop = asyncio.get_running_loop()
+        if self.pool is not None and document['shared']:
+            try:
+                record, worker_metrics = await loop.run_in_executor(
+                    self.pool, answer_in_worker, document['key'], question, self.time_budget)
+                if worker_metrics is not None:
+                    metrics.merge(worker_metrics)
+                return record
+            except LookupError:
+                pass  # Evicted from the cache; answer from the index held here
+        
+        def answer_here():
+            # One engine per thread, as reseeding a shared generator would race
+            engine = getattr(self.thread_state, 'engine', None)
+            if engine is None:
+                engine = self.thread_state.engine = AdvancedResponseEngine(
+                    deterministic=self.deterministic, query_cache=self.query_cache, memory_size=0)
+            answer = engine.generate_answer(question, document['index'],
+                                            deadline=time.monotonic() + self.time_budget)
+            return answer_record(question, answer)
+        
+        return await loop.run_in_executor(None, answer_here)
+    
+    def read_question(self, data):
+        question = data.get('question')
+        if not isinstance(question, str) or not question.strip():
+            raise HTTPError(400, "A non-empty 'question' is required")
+        return question.strip()
+    
+    async def ask(self, request):
+        data = request.json()
+        question = self.read_question(data)
+        document = self.find_document(data.get('document'))
+        return 200, await self.answer(document, question)
+    
+    # Metrics
+    
+    async def get_metrics(self, request):
+        if request.query.get('format') == 'json':
+            return 200, metrics.snapshot()
+        return 200, metrics.to_prometheus().encode('utf-8'), 'text/plain; version=0.0.4; charset=utf-8', None
+    
+    # Sessions
+    
+    async def create_session(self, request):
+        document = self.find_document(request.json().get('document'))
+        session_id = uuid.uuid4().hex
+        self.sessions[session_id] = {
+            'id': session_id,
+            'document': document['key'],
+            'messages': array('Q'),
+            'created': datetime.now().isoformat(timespec='seconds')
+        }
+        return 201, self.session_info(self.sessions[session_id])
+    
+    def find_session(self, session_id):
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise HTTPError(404, f"No such session: {session_id}")
+        return session
+    
+    def session_info(self, session):
+        return {
+            'id': session['id'],
+            'document': session['document'],
+            'messages': [
+                {'sender': message.role, 'text': message.text, 'timestamp': message.timestamp}
+                for message in self.messages.messages(session['messages'])
+            ],
+            'created': session['created']
+        }
+    
+    async def get_session(self, request, session_id):
+        return 200, self.session_info(self.find_session(session_id))
+    
+    async def delete_session(self, request, session_id):
+        self.find_session(session_id)
+        del self.sessions[session_id]
+        return 200, {'deleted': session_id}
+    
+    async def ask_in_session(self, request, session_id):
+        session = self.find_session(session_id)
+        question = self.read_question(request.json())
+        document = self.find_document(session['document'])
+        
+        session['messages'].append(self.messages.append('user', question))
+        record = await self.answer(document, question)
+        session['messages'].append(self.messages.append('bot', record['response']))
+        return 200, record
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m chatbot_engine.server',
+                                     description="Serve the question answering engine over HTTP/JSON.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=None,
+                        help="scoring processes (default: CPU count; 0 answers on threads in-process)")
+    parser.add_argument('--cache-dir', default=None,
+                        help="document cache directory (default ~/.advanced_chatbot_cache)")
+    parser.add_argument('--time-budget', type=float, default=1.5,
+                        help="seconds allowed for scoring one question")
+    parser.add_argument('--allow-paths', action='store_true',
+                        help="let clients load files from this machine by path")
+    parser.add_argument('--deterministic', action='store_true',
+                        help="give identical answers to identical questions about a document")
+    parser.add_argument('--metrics', action='store_true',
+                        help="time loading and answering stages, served at GET /metrics")
+    args = parser.parse_args(argv)
+    
+    if args.metrics:
+        metrics.enable()
+    
+    server = ChatbotServer(args.host, args.port, args.workers, DocumentCache(args.cache_dir),
+                           args.time_budget, args.allow_paths, args.deterministic)
+    
+    async def run():
+        await server.start()
+        print(f"Serving on http://{server.host}:{server.port}", file=sys.stderr)
+        await server.serve_forever()
+    
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,168 @@
+import os
+import sys
+import queue
+import sqlite3
+import threading
+
+class SessionStore:
+    """SQLite store of chat sessions, their messages and their documents
+    
+    Documents are stored once per content fingerprint however many sessions
+    use them. The database runs in WAL mode: writes are queued and committed
+    by a background thread in batches of up to batch_size, while reads share
+    their own connection under a lock and first wait for queued writes to
+    land. Listing sessions reads metadata only; messages and document text
+    are fetched per session when it is opened. A document no session uses
+    any more is deleted.
+    """
+    
+    batch_size = 200
+    
+    schema = """
+        CREATE TABLE IF NOT EXISTS documents (
+            hash TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            content TEXT NOT NULL,
+            summary TEXT NOT NULL,
+            char_count INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS sessions (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            created REAL NOT NULL,
+            document TEXT REFERENCES documents(hash)
+        );
+        CREATE TABLE IF NOT EXISTS messages (
+            id INTEGER PRIMARY KEY,
+            session_id INTEGER NOT NULL REFERENCES sessions(id),
+            role TEXT NOT NULL,
+            text TEXT NOT NULL,
+            created REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS messages_by_session ON messages (session_id, id);
+    """
+    
+    def __init__(self, path=None):
+        if path is None:
+            path = os.path.join(os.path.expanduser('~'), '.advanced_chatbot_sessions.db')
+        self.path = path
+        self.last_error = None
+        
+        self.reader = self.connect()
+        self.read_lock = threading.Lock()
+        self.reader.executescript(self.schema)
+        
+        self.writes = queue.Queue()
+        self.writer = threading.Thread(target=self.write_loop)
+        self.writer.daemon = True
+        self.writer.start()
+    
+    def connect(self):
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+    
+    # Writes, applied in order by the writer thread
+    
+    def add_session(self, session_id, name, created):
+        self.writes.put(('session', session_id, name, created))
+    
+    def add_message(self, session_id, role, text, created):
+        self.writes.put(('message', session_id, role, text, created))
+    
+    def set_document(self, session_id, index, summary):
+        """Attach a document to a session as its text is now
+        
+        The fingerprint and length are taken on the caller's thread, so text
+        appended later is not stored under them; the text itself is copied
+        off the caller's thread.
+        """
+        self.writes.put(('document', session_id, index.fingerprint, index.char_count, index, summary))
+    
+    def write_loop(self):
+        connection = self.connect()
+        while True:
+            batch = [self.writes.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.writes.get_nowait())
+                except queue.Empty:
+                    break
+            
+            try:
+                with connection:
+                    for write in batch:
+                        if write is not None:
+                            self.apply(connection, write)
+            except sqlite3.Error as e:
+                self.last_error = e
+                print(f"Session store write failed: {e}", file=sys.stderr)
+            finally:
+                for write in batch:
+                    self.writes.task_done()
+            
+            if None in batch:
+                connection.close()
+                return
+    
+    def apply(self, connection, write):
+        kind = write[0]
+        if kind == 'session':
+            connection.execute('INSERT OR REPLACE INTO sessions (id, name, created) VALUES (?, ?, ?)', write[1:])
+        elif kind == 'message':
+            connection.execute('INSERT INTO messages (session_id, role, text, created) VALUES (?, ?, ?, ?)',
+                               write[1:])
+        elif kind == 'document':
+            session_id, fingerprint, char_count, index, summary = write[1:]
+            known = connection.execute('SELECT 1 FROM documents WHERE hash = ?', (fingerprint,)).fetchone()
+            if known is None:
+                # Text only grows, so the text fingerprinted is this prefix of it
+                connection.execute(
+                    'INSERT INTO documents (hash, name, content, summary, char_count) VALUES (?, ?, ?, ?, ?)',
+                    (fingerprint, index.name, index.content[:char_count], summary, char_count))
+            previous = connection.execute('SELECT document FROM sessions WHERE id = ?', (session_id,)).fetchone()
+            connection.execute('UPDATE sessions SET document = ? WHERE id = ?', (fingerprint, session_id))
+            if previous is not None and previous[0] not in (None, fingerprint):
+                connection.execute('DELETE FROM documents WHERE hash = ? AND NOT EXISTS '
+                                   '(SELECT 1 FROM sessions WHERE document = ?)', (previous[0], previous[0]))
+    
+    def flush(self):
+        """Wait until every queued write is committed"""
+        self.writes.join()
+    
+    def close(self):
+        self.writes.put(None)
+        self.writer.join()
+        with self.read_lock:
+            self.reader.close()
+    
+    # Reads, from any thread
+    
+    def query(self, sql, parameters=()):
+        """Rows of a read, once every queued write has landed"""
+        self.flush()
+        with self.read_lock:
+            return self.reader.execute(sql, parameters).fetchall()
+    
+    def next_session_id(self):
+        return self.query('SELECT COALESCE(MAX(id), 0) + 1 FROM sessions')[0][0]
+    
+    def list_sessions(self):
+        """Metadata of every session, oldest first, without messages or text"""
+        rows = self.query('SELECT id, name, created, document FROM sessions ORDER BY id')
+        return [{'id': row[0], 'name': row[1], 'created': row[2], 'document': row[3]} for row in rows]
+    
+    def load_messages(self, session_id):
+        """(role, text, created) tuples of a session, in order"""
+        return self.query('SELECT role, text, created FROM messages WHERE session_id = ? ORDER BY id', (session_id,))
+    
+    def load_summary(self, fingerprint):
+        """(name, summary) of a stored document without its text, or None"""
+        rows = self.query('SELECT name, summary FROM documents WHERE hash = ?', (fingerprint,))
+        return rows[0] if rows else None
+    
+    def load_document(self, fingerprint):
+        """(name, content, summary) of a stored document, or None"""
+        rows = self.query('SELECT name, content, summary FROM documents WHERE hash = ?', (fingerprint,))
+        return rows[0] if rows else None
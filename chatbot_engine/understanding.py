@@ -0,0 +1,130 @@
+import re
+
+class ContextualUnderstanding:
+    """Understands question context and intent deeply"""
+    
+    def __init__(self):
+        self.question_patterns = {
+            'definition': {
+                'patterns': [r'what is', r'what are', r'define', r'meaning of', r'definition of'],
+                'intent': 'seeking_definition'
+            },
+            'explanation': {
+                'patterns': [r'why', r'how does', r'explain', r'reason', r'cause'],
+                'intent': 'seeking_explanation'
+            },
+            'procedure': {
+                'patterns': [r'how to', r'steps', r'process', r'method', r'way to'],
+                'intent': 'seeking_steps'
+            },
+            'comparison': {
+                'patterns': [r'difference', r'compare', r'versus', r'vs', r'better than'],
+                'intent': 'seeking_comparison'
+            },
+            'examples': {
+                'patterns': [r'example', r'instance', r'such as', r'like what'],
+                'intent': 'seeking_examples'
+            },
+            'listing': {
+                'patterns': [r'list', r'types of', r'kinds of', r'categories'],
+                'intent': 'seeking_list'
+            },
+            'yes_no': {
+                'patterns': [r'^is ', r'^are ', r'^does ', r'^do ', r'^can ', r'^will '],
+                'intent': 'seeking_confirmation'
+            },
+        }
+        
+        self.stop_words = {
+            'the', 'is', 'at', 'which', 'on', 'a', 'an', 'as', 'are', 'was', 'were',
+            'been', 'be', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would',
+            'should', 'could', 'may', 'might', 'must', 'can', 'of', 'for', 'to', 'in',
+            'by', 'with', 'from', 'about', 'into', 'through', 'during', 'before', 'after'
+        }
+        
+        # When a question matches several types, the first one listed here wins.
+        # This keeps the behaviour of the original per-pattern loop, where a
+        # later group in question_patterns overrode an earlier one.
+        self.type_precedence = [
+            'yes_no', 'listing', 'examples', 'comparison', 'procedure', 'explanation', 'definition'
+        ]
+        self.type_rank = {qtype: rank for rank, qtype in enumerate(self.type_precedence)}
+        
+        # One alternation of named groups inside a lookahead, so a single scan
+        # reports every type matching at every position of the question
+        alternatives = [
+            f"(?P<{qtype}>{'|'.join(self.question_patterns[qtype]['patterns'])})"
+            for qtype in self.type_precedence
+        ]
+        self.question_regex = re.compile('(?=' + '|'.join(alternatives) + ')')
+    
+    def classify_question(self, question_lower):
+        """Return the highest-precedence question type matching the question"""
+        best_rank = len(self.type_precedence)
+        for match in self.question_regex.finditer(question_lower):
+            rank = self.type_rank[match.lastgroup]
+            if rank < best_rank:
+                best_rank = rank
+                if rank == 0:
+                    break
+        
+        if best_rank == len(self.type_precedence):
+            return 'general', 'seeking_information'
+        q_type = self.type_precedence[best_rank]
+        return q_type, self.question_patterns[q_type]['intent']
+    
+    def analyze_question(self, question):
+        """Deep analysis of question intent"""
+        question_lower = question.lower()
+        
+        # Detect question type
+        q_type, intent = self.classify_question(question_lower)
+        
+        # Extract key concepts (not just keywords)
+        concepts = self.extract_concepts(question)
+        
+        # Determine complexity
+        complexity = 'simple' if len(question.split()) < 8 else 'complex'
+        
+        return {
+            'type': q_type,
+            'intent': intent,
+            'concepts': concepts,
+            'complexity': complexity,
+            'requires_detail': 'explain' in question_lower or 'detail' in question_lower
+        }
+    
+    def analyze_many(self, questions):
+        """Analyze a batch of questions; repeated questions are analyzed once
+        
+        Each result is a separate dict, so callers can change one without
+        affecting the other copies of a repeated question.
+        """
+        analyzed = {}
+        results = []
+        for question in questions:
+            analysis = analyzed.get(question)
+            if analysis is None:
+                analysis = analyzed[question] = self.analyze_question(question)
+                results.append(analysis)
+            else:
+                concepts = {kind: list(values) for kind, values in analysis['concepts'].items()}
+                results.append(dict(analysis, concepts=concepts))
+        return results
+    
+    def extract_concepts(self, text):
+        """Extract main concepts from question"""
+        words = re.findall(r'\b[a-z]{3,}\b', text.lower())
+        concepts = [w for w in words if w not in self.stop_words]
+        
+        # Find phrases (2-3 word combinations)
+        words_list = text.lower().split()
+        phrases = []
+        for i in range(len(words_list) - 1):
+            if words_list[i] not in self.stop_words and words_list[i+1] not in self.stop_words:
+                phrases.append(f"{words_list[i]} {words_list[i+1]}")
+        
+        return {
+            'keywords': concepts[:5],
+            'phrases': phrases[:3]
+        }
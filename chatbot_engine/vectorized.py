@@ -0,0 +1,191 @@
+import numpy as np
+
+from .index import MappedPostings, CompactPostings
+from .metrics import metrics
+
+class SentenceColumns:
+    """Per-sentence arrays of an index, as NumPy vectors
+    
+    Besides the token counts and paragraph ids, the length and position
+    bonuses of every sentence are precomputed here, so first-stage scoring
+    gathers them for all candidates at once.
+    """
+    
+    def __init__(self, index, count):
+        self.count = count
+        self.token_counts = self.vector(index.token_counts, count)
+        self.paragraphs = self.vector(index.sentence_paragraphs, count)
+        word_counts = self.vector(index.word_counts, count)
+        self.length_bonus = (word_counts > 10) & (word_counts < 50)
+        self.position_bonus = np.zeros(count)
+        for sentence_id, bonus in index.position_bonuses():
+            if sentence_id < count:
+                self.position_bonus[sentence_id] = bonus
+    
+    def vector(self, values, count):
+        # Memory-mapped sections are viewed in place; arrays that are still
+        # growing are copied, as a view would stop them from being resized
+        if isinstance(values, memoryview):
+            return np.frombuffer(values, dtype=np.uint32)[:count]
+        return np.array(values[:count], dtype=np.int64)
+
+class TermMatrix:
+    """The term-sentence matrix of an index in CSR form, one row per term
+    
+    Each row holds the ids of the sentences containing a term and the term's
+    frequency in each. A cached index already stores its postings this way,
+    so its rows are views of the mapped sections. For an index in memory a
+    row is converted from the postings the first time its term is queried,
+    and again only once the term has gained postings.
+    """
+    
+    def __init__(self, index):
+        self.index = index
+        self.rows = {}
+        self.columns = None
+        
+        postings = index.postings
+        if isinstance(postings, MappedPostings):
+            self.posting_offsets = np.frombuffer(postings.posting_offsets, dtype=np.uint64)
+            self.sentence_ids = np.frombuffer(postings.sentence_ids, dtype=np.uint32)
+            self.frequencies = np.frombuffer(postings.frequencies, dtype=np.uint32)
+    
+    @classmethod
+    def for_index(cls, index):
+        if index._term_matrix is None:
+            index._term_matrix = cls(index)
+        return index._term_matrix
+    
+    def row(self, term):
+        """(sentence ids, frequencies) of a term, or None if it never occurs"""
+        postings = self.index.postings
+        if isinstance(postings, MappedPostings):
+            i = postings.find(term)
+            if i < 0:
+                return None
+            start, stop = self.posting_offsets[i], self.posting_offsets[i + 1]
+            return self.sentence_ids[start:stop], self.frequencies[start:stop]
+        
+        if isinstance(postings, CompactPostings):
+            values = postings.arrays.get(term)
+            length = len(values) // 2 if values is not None else 0
+        else:
+            values = postings.get(term)
+            length = len(values) if values is not None else 0
+        if not length:
+            return None
+        
+        cached = self.rows.get(term)
+        if cached is None or cached[0] != length:
+            if isinstance(postings, CompactPostings):
+                pairs = np.array(values[:2 * length], dtype=np.int64).reshape(-1, 2)
+            else:
+                pairs = np.array(values[:length], dtype=np.int64).reshape(-1, 2)
+            cached = self.rows[term] = (length, pairs[:, 0], pairs[:, 1])
+        return cached[1], cached[2]
+    
+    def sentence_columns(self, count):
+        """SentenceColumns covering at least the first count sentences"""
+        if self.columns is None or self.columns.count < count:
+            # Paragraph ids are the last of these arrays a new sentence is
+            # added to, so every sentence they cover is in the others too
+            self.columns = SentenceColumns(self.index, len(self.index.sentence_paragraphs))
+        return self.columns
+
+def select_passages(matcher, query, index, limit, deadline=None, cancel_event=None):
+    """SemanticMatcher.select_passages with NumPy
+    
+    Scoring a question is one sparse product of the query's term weights with
+    the term-sentence matrix, restricted to the sentences it touches, plus
+    the precomputed bonus vectors; argpartition then picks the best passages.
+    Every score is computed with the same operations in the same order as the
+    pure-Python path, so both select the same sentences.
+    """
+    matrix = TermMatrix.for_index(index)
+    
+    with metrics.timer('find_relevant_content.candidates'):
+        terms = list(query['keywords'])
+        for phrase, phrase_tokens in query['phrases']:
+            terms.extend(phrase_tokens)
+        
+        rows = {}
+        for term in dict.fromkeys(terms):
+            if matcher.out_of_time(deadline, cancel_event):
+                break
+            row = matrix.row(term)
+            if row is not None:
+                rows[term] = row
+        if not rows:
+            return 0, set(), {}
+        
+        # Candidate sentences, and where each row's sentences fall among them
+        ids = np.unique(np.concatenate([sentence_ids for sentence_ids, frequencies in rows.values()]))
+        ids = ids.astype(np.int64)
+        positions = {term: np.searchsorted(ids, sentence_ids) for term, (sentence_ids, frequencies) in rows.items()}
+    
+    with metrics.timer('find_relevant_content.scoring'):
+        count = len(ids)
+        columns = matrix.sentence_columns(int(ids[-1]) + 1)
+        
+        # Keywords: 2 points plus BM25 weight each, as in score_sentence
+        scores = np.zeros(count)
+        length_norm = 1 - index.b + index.b * columns.token_counts[ids] / index.avg_length
+        for keyword in query['keywords']:
+            if keyword not in rows:
+                continue
+            where = positions[keyword]
+            tf = rows[keyword][1].astype(np.float64)
+            scores[where] += 2
+            scores[where] += query['idfs'][keyword] * tf * (index.k1 + 1) / (tf + index.k1 * length_norm[where])
+        
+        # Phrases count once all their words occur, as in the first Python stage
+        for phrase, phrase_tokens in query['phrases']:
+            matched = np.ones(count, dtype=bool)
+            for token in phrase_tokens:
+                present = np.zeros(count, dtype=bool)
+                if token in rows:
+                    present[positions[token]] = True
+                matched &= present
+            scores[matched] += 5
+        
+        scores[columns.length_bonus[ids]] += 1
+        estimates = scores + columns.position_bonus[ids]
+        
+        # Neighbours in the same paragraph that are candidates too, by offset
+        paragraphs = columns.paragraphs[ids]
+        neighbours = []
+        context = np.zeros(count)
+        for offset in range(-matcher.passage_radius, matcher.passage_radius + 1):
+            if offset == 0:
+                continue
+            neighbour = np.minimum(np.searchsorted(ids, ids + offset), count - 1)
+            found = (ids[neighbour] == ids + offset) & (paragraphs[neighbour] == paragraphs)
+            context[found] += estimates[neighbour[found]]
+            neighbours.append((neighbour, found))
+        passages = estimates + matcher.context_weight * context
+        
+        # The best passages, equal scores favouring earlier sentences
+        best = np.flatnonzero(estimates > 0)
+        if len(best) > limit:
+            top = np.argpartition(-passages[best], limit - 1)[:limit]
+            best = best[passages[best] >= passages[best[top]].min()]
+        best = best[np.lexsort((ids[best], -passages[best]))][:limit]
+    
+    # Sentences to re-rank, and the term counts re-ranking reads: theirs and
+    # their neighbours', for the context bonus
+    selected = [best]
+    for neighbour, found in neighbours:
+        linked = neighbour[best][found[best]]
+        selected.append(linked[estimates[linked] > 0])
+    selected = np.unique(np.concatenate(selected))
+    needed = [selected]
+    for neighbour, found in neighbours:
+        needed.append(neighbour[selected][found[selected]])
+    needed = np.unique(np.concatenate(needed))
+    
+    candidates = {sentence_id: {} for sentence_id in ids[needed].tolist()}
+    for term, (sentence_ids, frequencies) in rows.items():
+        keep = np.isin(positions[term], needed)
+        for sentence_id, tf in zip(ids[positions[term][keep]].tolist(), frequencies[keep].tolist()):
+            candidates[sentence_id][term] = tf
+    return count, set(ids[selected].tolist()), candidates
@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+
+from chatbot_engine import DocumentCache, DocumentIndex, MappedDocumentIndex, SemanticMatcher
+
+TEXT = ("The cache layer keeps every index on disk. Entries are keyed by content hash.\n\n"
+        "Opening an entry maps the file instead of reading it. Ünïcode text is stored as UTF-8 bytes.\n\n"
+        "Old entries are evicted once the cache grows past its size limit.")
+
+class DocumentCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = DocumentCache(self.directory.name)
+    
+    def tearDown(self):
+        self.directory.cleanup()
+    
+    def test_round_trip(self):
+        index = DocumentIndex(TEXT, name="notes.txt")
+        key = self.cache.key_for_fingerprint(index.fingerprint, 1)
+        self.cache.put(key, index)
+        cached = self.cache.get(key)
+        
+        self.assertIsInstance(cached, MappedDocumentIndex)
+        self.assertEqual(cached.name, "notes.txt")
+        self.assertEqual(list(cached.sentences), list(index.sentences))
+        self.assertEqual(list(cached.sentence_pages), list(index.sentence_pages))
+        self.assertEqual(list(cached.sentence_paragraphs), list(index.sentence_paragraphs))
+        self.assertEqual(cached.content, index.content)
+        self.assertEqual(cached.char_count, index.char_count)
+        self.assertEqual(cached.fingerprint, index.fingerprint)
+        self.assertEqual(cached.summarize(), index.summarize())
+        
+        matcher = SemanticMatcher(vectorized=False)
+        for question in ["How are cache entries keyed?", "What happens to old entries?"]:
+            self.assertEqual(matcher.find_relevant_content(question, cached)[0],
+                             matcher.find_relevant_content(question, index)[0])
+    
+    def test_misses_and_unreadable_entries(self):
+        self.assertIsNone(self.cache.get("missing-v1"))
+        with open(self.cache.entry_path("broken-v1"), 'wb') as f:
+            f.write(b"not an index")
+        self.assertIsNone(self.cache.get("broken-v1"))
+    
+    def test_keys_follow_content_and_version(self):
+        path = os.path.join(self.directory.name, "notes.txt")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(TEXT)
+        index = DocumentIndex(TEXT)
+        self.assertEqual(self.cache.key_for(path, 2), self.cache.key_for_fingerprint(index.fingerprint, 2))
+        self.assertEqual(self.cache.key_for_bytes(TEXT.encode('utf-8'), 2), self.cache.key_for(path, 2))
+        self.assertNotEqual(self.cache.key_for(path, 2), self.cache.key_for(path, 3))
+    
+    def test_eviction_keeps_the_newest_entry(self):
+        index = DocumentIndex(TEXT)
+        self.cache.put("first-v1", index)
+        self.cache.max_bytes = os.path.getsize(self.cache.entry_path("first-v1")) + 1
+        self.cache.put("second-v1", index)
+        self.assertIsNone(self.cache.get("first-v1"))
+        self.assertIsNotNone(self.cache.get("second-v1"))
+
+if __name__ == '__main__':
+    unittest.main()
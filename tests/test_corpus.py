@@ -0,0 +1,44 @@
+import os
+import pickle
+import tempfile
+import unittest
+
+from chatbot_engine import DocumentCorpus, DocumentIndex
+
+class MultiWorkerIngestTest(unittest.TestCase):
+    """Indexes come back from corpus workers pickled, whatever the core count"""
+    
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.paths = []
+        for n in range(3):
+            path = os.path.join(self.directory.name, f"doc{n}.txt")
+            with open(path, 'w', encoding='utf-8') as f:
+                for i in range(50):
+                    f.write(f"Document {n} sentence {i} talks about the cache layer and its model.\n")
+            self.paths.append(path)
+    
+    def tearDown(self):
+        self.directory.cleanup()
+    
+    def test_pool_matches_serial(self):
+        serial = DocumentCorpus()
+        serial.ingest(self.paths, workers=1)
+        pooled = DocumentCorpus()
+        pooled.ingest(self.paths, workers=2)
+        
+        self.assertEqual(pooled.failed, [])
+        self.assertEqual(len(pooled.sentences), 150)
+        self.assertEqual(list(pooled.sentences), list(serial.sentences))
+        self.assertEqual(pooled.fingerprint, serial.fingerprint)
+    
+    def test_pickled_index_keeps_fingerprinting(self):
+        index = DocumentIndex("The first sentence is long enough to index.")
+        index.fingerprint
+        copy = pickle.loads(pickle.dumps(index))
+        index.append("A second sentence is added afterwards.")
+        copy.append("A second sentence is added afterwards.")
+        self.assertEqual(copy.fingerprint, index.fingerprint)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+from unittest import mock
+
+from chatbot_engine import AdvancedResponseEngine, DocumentIndex, QueryCache
+
+TEXT = ("A load balancer spreads requests over several servers. It checks the health of each server.\n\n"
+        "The cache layer keeps every index on disk. Entries are keyed by content hash.")
+
+class QueryCacheTest(unittest.TestCase):
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = QueryCache(max_entries=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.put('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual((cache.get('a'), cache.get('c')), (1, 3))
+        self.assertEqual(cache.stats()['evictions'], 1)
+    
+    def test_entries_expire_after_ttl(self):
+        cache = QueryCache(ttl=10)
+        with mock.patch('chatbot_engine.engine.time.monotonic', return_value=100.0):
+            cache.put('a', 1)
+        with mock.patch('chatbot_engine.engine.time.monotonic', return_value=110.0):
+            self.assertEqual(cache.get('a'), 1)
+        with mock.patch('chatbot_engine.engine.time.monotonic', return_value=110.5):
+            self.assertIsNone(cache.get('a'))
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['expirations'], stats['entries']), (1, 1, 1, 0))
+    
+    def test_invalidate_one_document(self):
+        cache = QueryCache()
+        cache.put(('doc1', 'q'), 1)
+        cache.put(('doc2', 'q'), 2)
+        cache.invalidate('doc1')
+        self.assertIsNone(cache.get(('doc1', 'q')))
+        self.assertEqual(cache.get(('doc2', 'q')), 2)
+
+class EngineCacheTest(unittest.TestCase):
+    def test_rephrased_question_is_served_from_the_cache(self):
+        engine = AdvancedResponseEngine(deterministic=True)
+        index = DocumentIndex(TEXT)
+        first, analysis = engine.find_relevant_content("How does the load balancer check servers?", index)
+        second, analysis = engine.find_relevant_content("how does the LOAD BALANCER check servers", index)
+        self.assertEqual(engine.query_cache.stats()['hits'], 1)
+        self.assertEqual(second, first)
+    
+    def test_changed_text_is_not_served_stale_rankings(self):
+        engine = AdvancedResponseEngine(deterministic=True)
+        index = DocumentIndex(TEXT)
+        engine.find_relevant_content("How are cache entries keyed?", index)
+        index.append("Cache entries are keyed by content hash and extractor version.")
+        relevant, analysis = engine.find_relevant_content("How are cache entries keyed?", index)
+        self.assertEqual(engine.query_cache.stats()['hits'], 0)
+        self.assertIn(len(index.sentences) - 1, [result['id'] for result in relevant])
+    
+    def test_deterministic_answers_repeat(self):
+        index = DocumentIndex(TEXT)
+        answers = [AdvancedResponseEngine(deterministic=True).generate_response("What is a load balancer?", index)
+                   for _ in range(2)]
+        self.assertEqual(answers[0], answers[1])
+
+if __name__ == '__main__':
+    unittest.main()
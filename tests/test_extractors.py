@@ -0,0 +1,105 @@
+import os
+import zipfile
+import tempfile
+import unittest
+
+from chatbot_engine import DocumentIndex
+from chatbot_engine.extractors import iter_pptx_slides, iter_txt_chunks
+
+P = 'http://schemas.openxmlformats.org/presentationml/2006/main'
+A = 'http://schemas.openxmlformats.org/drawingml/2006/main'
+R = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+PKG = 'http://schemas.openxmlformats.org/package/2006/relationships'
+
+def shape(paragraphs, placeholder=None):
+    ph = f'<p:ph type="{placeholder}"/>' if placeholder else ''
+    body = ''.join(f'<a:p><a:r><a:t>{text}</a:t></a:r></a:p>' for text in paragraphs)
+    return f'<p:sp><p:nvSpPr><p:cNvPr id="1" name="s"/><p:cNvSpPr/><p:nvPr>{ph}</p:nvPr></p:nvSpPr><p:txBody>{body}</p:txBody></p:sp>'
+
+def table(rows):
+    cells = ''.join('<a:tr>' + ''.join(f'<a:tc><a:txBody><a:p><a:r><a:t>{cell}</a:t></a:r></a:p></a:txBody></a:tc>'
+                                       for cell in row) + '</a:tr>' for row in rows)
+    return f'<p:graphicFrame><a:graphic><a:graphicData><a:tbl>{cells}</a:tbl></a:graphicData></a:graphic></p:graphicFrame>'
+
+def part(shapes):
+    return (f'<p:sld xmlns:p="{P}" xmlns:a="{A}" xmlns:r="{R}"><p:cSld><p:spTree>{shapes}</p:spTree></p:cSld></p:sld>')
+
+def make_pptx(path, slides):
+    """A minimal PPTX: slides are (shapes XML, notes text or None), listed in reverse archive order"""
+    with zipfile.ZipFile(path, 'w') as archive:
+        ids = ''.join(f'<p:sldId id="{256 + n}" r:id="rId{n}"/>' for n in range(1, len(slides) + 1))
+        archive.writestr('ppt/presentation.xml', f'<p:presentation xmlns:p="{P}" xmlns:r="{R}"><p:sldIdLst>{ids}</p:sldIdLst></p:presentation>')
+        # Slide parts are numbered backwards, so order must come from sldIdLst
+        rels = ''.join(f'<Relationship Id="rId{n}" Type="{R}/slide" Target="slides/slide{len(slides) + 1 - n}.xml"/>'
+                       for n in range(1, len(slides) + 1))
+        archive.writestr('ppt/_rels/presentation.xml.rels', f'<Relationships xmlns="{PKG}">{rels}</Relationships>')
+        for n, (shapes, notes) in enumerate(slides, 1):
+            number = len(slides) + 1 - n
+            archive.writestr(f'ppt/slides/slide{number}.xml', part(shapes))
+            if notes is not None:
+                archive.writestr(f'ppt/slides/_rels/slide{number}.xml.rels',
+                                 f'<Relationships xmlns="{PKG}"><Relationship Id="rId1" Type="{R}/notesSlide" '
+                                 f'Target="../notesSlides/notesSlide{number}.xml"/></Relationships>')
+                archive.writestr(f'ppt/notesSlides/notesSlide{number}.xml',
+                                 part(shape(['1'], 'sldNum') + shape([notes], 'body')))
+
+class PptxExtractionTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'deck.pptx')
+        slides = []
+        for n in range(1, 4):
+            shapes = (shape([f'Slide title number {n}'], 'title') +
+                      shape([f'Body text for slide {n} about caching']) +
+                      f'<p:grpSp>{shape([f"Grouped note {n}"])}</p:grpSp>' +
+                      table([['Name', 'Value'], [f'row{n}', '42']]))
+            slides.append((shapes, f'Speaker notes for slide {n}'))
+        make_pptx(self.path, slides)
+    
+    def tearDown(self):
+        self.directory.cleanup()
+    
+    def test_slides_in_presentation_order_with_tables_groups_and_notes(self):
+        slides = list(iter_pptx_slides(self.path, workers=1))
+        self.assertEqual([(number, count) for number, count, text in slides], [(1, 3), (2, 3), (3, 3)])
+        text = slides[1][2]
+        self.assertEqual(text.splitlines(), [
+            'Slide title number 2', 'Body text for slide 2 about caching', 'Grouped note 2',
+            'Name | Value', 'row2 | 42', 'Speaker notes for slide 2'])
+    
+    def test_notes_left_out(self):
+        slides = list(iter_pptx_slides(self.path, workers=1, include_notes=False))
+        self.assertNotIn('Speaker notes', ''.join(text for number, count, text in slides))
+    
+    def test_process_pool_matches_in_process(self):
+        serial = list(iter_pptx_slides(self.path, workers=1))
+        pooled = list(iter_pptx_slides(self.path, workers=2, slides_per_chunk=1))
+        self.assertEqual(pooled, serial)
+    
+    def test_sentences_cite_their_own_slide(self):
+        index = DocumentIndex()
+        for number, count, text in iter_pptx_slides(self.path, workers=1):
+            index.feed(text, page=number)
+        index.finish()
+        for n in range(1, 4):
+            title = [i for i, sentence in enumerate(index.sentences) if f'Slide title number {n}' in sentence]
+            body = [i for i, sentence in enumerate(index.sentences) if f'Body text for slide {n} ' in sentence]
+            self.assertEqual(len(title), 1)
+            self.assertEqual(index.sentence_pages[title[0]], n)
+            self.assertEqual(index.sentence_pages[body[0]], n)
+            # Text without a full stop ends at the slide, not in the next one
+            self.assertNotIn(f'number {n + 1}', index.sentences[body[0]])
+
+class TxtChunkTest(unittest.TestCase):
+    def test_chunks_join_into_the_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'a.txt')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('Ünïcode text. ' * 1000)
+            chunks = list(iter_txt_chunks(path, chunk_size=1000))
+            self.assertTrue(all(len(chunk) <= 1000 for chunk in chunks))
+            with open(path, encoding='utf-8') as f:
+                self.assertEqual(''.join(chunks), f.read())
+
+if __name__ == '__main__':
+    unittest.main()
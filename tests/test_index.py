@@ -0,0 +1,81 @@
+import random
+import unittest
+
+from chatbot_engine import DocumentIndex, DocumentStore
+
+class SentenceSplitTest(unittest.TestCase):
+    def split(self, text):
+        return list(DocumentIndex(text).sentences)
+    
+    def test_abbreviations_initialisms_and_decimals(self):
+        self.assertEqual(self.split("Dr. Smith measured version 3.5 of the cache. See e.g. the U.S. Army manual."),
+                         ["Dr. Smith measured version 3.5 of the cache", "See e.g. the U.S. Army manual"])
+    
+    def test_initials_in_names(self):
+        self.assertEqual(self.split("The talk was given by John F. Kennedy in the hall. "
+                                    "The book by J. R. R. Tolkien is long and well known."),
+                         ["The talk was given by John F. Kennedy in the hall",
+                          "The book by J. R. R. Tolkien is long and well known"])
+    
+    def test_single_capital_can_end_a_sentence(self):
+        self.assertEqual(self.split("The team finally settled on plan A. Next they deployed it everywhere."),
+                         ["The team finally settled on plan A", "Next they deployed it everywhere"])
+    
+    def test_closing_quotes_and_brackets_stay_with_their_sentence(self):
+        self.assertEqual(self.split('He said "stop the service now." Then the team went home. '
+                                    'The device (shown in figure two.) Then it restarted again.'),
+                         ['He said "stop the service now."', "Then the team went home",
+                          "The device (shown in figure two.)", "Then it restarted again"])
+    
+    def test_spans_match_the_text(self):
+        text = 'He said ”stop the service now.” Dr. Smith left. The U.S. team stayed late.'
+        index = DocumentIndex(text)
+        self.assertEqual([text[start:end] for start, end in zip(index.sentence_starts, index.sentence_ends)],
+                         list(index.sentences))
+
+class IncrementalIndexTest(unittest.TestCase):
+    words = "alpha Beta gamma Dr. e.g. 3.14 U.S. approx. J. R. A F. Smith plan (see fig.) ‘quoted.’".split()
+    endings = ['. ', '! ', '? ', '.\n\n', '\n\n', ' ', '." ', '.” ', '.) ', '. A. ']
+    
+    def random_text(self, rng):
+        return ''.join(' '.join(rng.choice(self.words) for _ in range(rng.randint(1, 12))) + rng.choice(self.endings)
+                       for _ in range(60))
+    
+    def assertSameIndex(self, first, second):
+        self.assertEqual(list(first.sentences), list(second.sentences))
+        self.assertEqual(list(first.sentence_paragraphs), list(second.sentence_paragraphs))
+        self.assertEqual(list(first.sentence_pages), list(second.sentence_pages))
+        self.assertEqual(first.fingerprint, second.fingerprint)
+    
+    def test_chunked_feed_matches_whole_text(self):
+        rng = random.Random(5)
+        for trial in range(50):
+            text = self.random_text(rng)
+            size = rng.randint(1, 40)
+            for store in (None, DocumentStore()):
+                chunked = DocumentIndex(store=store)
+                for i in range(0, len(text), size):
+                    chunked.feed(text[i:i + size])
+                chunked.finish()
+                self.assertSameIndex(chunked, DocumentIndex(text))
+    
+    def test_append_matches_indexing_the_joined_text(self):
+        first = "The cache keeps every index on disk. It is opened with mmap."
+        second = "Appended text adds new sentences. The summary may change."
+        index = DocumentIndex(first)
+        index.summarize()
+        index.append(second)
+        self.assertSameIndex(index, DocumentIndex(first + "\n\n" + second))
+        self.assertEqual(index.summarize(), DocumentIndex(first + "\n\n" + second).summarize())
+    
+    def test_sentences_end_at_page_boundaries(self):
+        index = DocumentIndex()
+        index.feed("First page text without a full stop", page=1)
+        index.feed("Second page starts here and ends here.", page=2)
+        index.finish()
+        self.assertEqual(list(index.sentences), ["First page text without a full stop",
+                                                 "Second page starts here and ends here"])
+        self.assertEqual(list(index.sentence_pages), [1, 2])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import time
+import tempfile
+import unittest
+
+from chatbot_engine import DocumentCache, DocumentCorpus, DocumentIndex, DocumentStore, SemanticMatcher
+from chatbot_engine.benchmark import iter_synthetic_text, make_questions
+from chatbot_engine.matcher import NUMPY_AVAILABLE
+
+class TwoStageRetrievalTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.index = DocumentIndex(''.join(iter_synthetic_text(60 * 1024, seed=3)))
+        cls.questions = [question for q_type, question in make_questions(3, per_type=4)]
+    
+    def exhaustive(self, matcher, question, top_n=5):
+        """Stage-two scores for every candidate sentence, ranked like find_relevant_content"""
+        analysis = matcher.context_understanding.analyze_question(question)
+        query = matcher.prepare_query(analysis['concepts'], self.index)
+        candidates = matcher.candidate_sentences(query, self.index)
+        results = [matcher.compute_semantic_score(query, self.index, i, candidates[i], candidates)
+                   for i in sorted(candidates)]
+        results.sort(key=lambda result: result['score'], reverse=True)
+        return [result for result in results[:top_n] if result['score'] > 0]
+    
+    def test_rerank_all_passages_matches_exhaustive_scoring(self):
+        matcher = SemanticMatcher(vectorized=False)
+        matcher.passages_per_result = len(self.index.sentences)
+        for question in self.questions:
+            self.assertEqual(matcher.find_relevant_content(question, self.index)[0],
+                             self.exhaustive(matcher, question), question)
+    
+    def test_results_ranked_and_positive(self):
+        matcher = SemanticMatcher(vectorized=False)
+        for question in self.questions:
+            results, analysis = matcher.find_relevant_content(question, self.index)
+            scores = [result['score'] for result in results]
+            self.assertEqual(scores, sorted(scores, reverse=True))
+            self.assertTrue(all(score > 0 for score in scores))
+            self.assertLessEqual(len(results), 5)
+    
+    def test_best_sentence_found_first(self):
+        index = DocumentIndex("Servers answer requests all day long.\n\n"
+                              "A load balancer spreads requests over several healthy servers.\n\n"
+                              "The balancer itself is replicated for safety.")
+        results, analysis = SemanticMatcher(vectorized=False).find_relevant_content(
+            "How does a load balancer spread requests?", index)
+        self.assertEqual(results[0]['id'], 1)
+    
+    def test_spent_deadline_still_returns(self):
+        matcher = SemanticMatcher(vectorized=False)
+        results, analysis = matcher.find_relevant_content(self.questions[0], self.index,
+                                                          deadline=time.monotonic() - 1)
+        self.assertIsInstance(results, list)
+
+@unittest.skipUnless(NUMPY_AVAILABLE, "NumPy is not installed")
+class VectorizedRankingTest(unittest.TestCase):
+    """The NumPy first stage selects exactly what the pure-Python one does"""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.text = ''.join(iter_synthetic_text(80 * 1024, seed=2))
+        cls.questions = [question for q_type, question in make_questions(3, per_type=6)]
+        cls.questions += ["How does the cache layer work?", "x"]
+    
+    def setUp(self):
+        self.python = SemanticMatcher(vectorized=False)
+        self.numpy = SemanticMatcher(vectorized=True)
+        self.numpy.vectorize_min_sentences = 0
+    
+    def assertSameRankings(self, index):
+        for question in self.questions:
+            self.assertEqual(self.numpy.find_relevant_content(question, index)[0],
+                             self.python.find_relevant_content(question, index)[0], question)
+    
+    def test_in_memory_and_store_indexes(self):
+        self.assertSameRankings(DocumentIndex(self.text))
+        self.assertSameRankings(DocumentIndex(self.text, store=DocumentStore()))
+    
+    def test_cached_index(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = DocumentCache(directory)
+            cache.put('synthetic-v1', DocumentIndex(self.text))
+            self.assertSameRankings(cache.get('synthetic-v1'))
+    
+    def test_corpus(self):
+        corpus = DocumentCorpus()
+        fifth = len(self.text) // 5
+        for i in range(5):
+            corpus.add_document(DocumentIndex(self.text[i * fifth:(i + 1) * fifth], name=f"part{i}.txt"))
+        self.assertSameRankings(corpus)
+    
+    def test_index_growing_between_questions(self):
+        half = len(self.text) // 2
+        index = DocumentIndex(self.text[:half])
+        self.assertSameRankings(index)
+        index.append(self.text[half:])
+        self.assertSameRankings(index)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import os
+import tempfile
+import unittest
+
+from chatbot_engine import MessageLog
+
+class MessageLogTest(unittest.TestCase):
+    def texts(self, log, seqs):
+        return [message.text for message in log.messages(seqs)]
+    
+    def test_oldest_messages_dropped_without_spill(self):
+        log = MessageLog(capacity=3)
+        seqs = [log.append('user', f"Message {i}", created=float(i)) for i in range(5)]
+        self.assertEqual(seqs, list(range(5)))
+        self.assertEqual(len(log), 3)
+        self.assertIsNone(log.get(0))
+        self.assertEqual(self.texts(log, seqs), ["Message 2", "Message 3", "Message 4"])
+    
+    def test_spilled_messages_read_back(self):
+        log = MessageLog(capacity=3, spill=True)
+        seqs = [log.append('user' if i % 2 else 'bot', f"Mëssage {i}", created=float(i)) for i in range(10)]
+        self.assertEqual(len(log), 3)
+        self.assertEqual(self.texts(log, seqs), [f"Mëssage {i}" for i in range(10)])
+        message = log.get(1)
+        self.assertEqual((message.role, message.created), ('user', 1.0))
+    
+    def test_spill_to_a_path(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'messages.jsonl')
+            log = MessageLog(capacity=1, spill=path)
+            log.append('user', "First")
+            log.append('bot', "Second")
+            self.assertEqual(self.texts(log, [0, 1]), ["First", "Second"])
+            log.spill_file.close()
+            self.assertGreater(os.path.getsize(path), 0)
+    
+    def test_clear(self):
+        log = MessageLog(capacity=2, spill=True)
+        for i in range(4):
+            log.append('user', f"Message {i}")
+        log.clear()
+        self.assertEqual(len(log), 0)
+        self.assertEqual(self.texts(log, range(4)), [])
+        seq = log.append('user', "After")
+        self.assertEqual(seq, 4)
+        self.assertEqual(log.get(seq).text, "After")
+    
+    def test_capacity_must_be_positive(self):
+        with self.assertRaises(ValueError):
+            MessageLog(capacity=0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from chatbot_engine import DocumentIndex, SessionStore
+
+class SessionStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = SessionStore(os.path.join(self.directory.name, 'sessions.db'))
+    
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+    
+    def document_count(self):
+        return self.store.query('SELECT COUNT(*) FROM documents')[0][0]
+    
+    def test_sessions_messages_and_documents_round_trip(self):
+        index = DocumentIndex("The cache layer keeps every index on disk for later.", name="notes.txt")
+        self.store.add_session(1, "Chat 1", 10.0)
+        self.store.add_message(1, 'user', "What is cached?", 11.0)
+        self.store.add_message(1, 'bot', "Every index.", 12.0)
+        self.store.set_document(1, index, "A summary")
+        
+        self.assertEqual(self.store.list_sessions(),
+                         [{'id': 1, 'name': "Chat 1", 'created': 10.0, 'document': index.fingerprint}])
+        self.assertEqual(self.store.load_messages(1), [('user', "What is cached?", 11.0), ('bot', "Every index.", 12.0)])
+        self.assertEqual(self.store.load_summary(index.fingerprint), ("notes.txt", "A summary"))
+        self.assertEqual(self.store.load_document(index.fingerprint), ("notes.txt", index.content, "A summary"))
+        self.assertIsNone(self.store.load_document("missing"))
+        self.assertEqual(self.store.next_session_id(), 2)
+    
+    def test_appended_text_replaces_the_stored_copy(self):
+        index = DocumentIndex("The first paragraph is long enough to index.", name="notes.txt")
+        self.store.add_session(1, "Chat 1", 10.0)
+        self.store.set_document(1, index, "A summary")
+        before = index.fingerprint
+        index.append("A second paragraph is added to the document.")
+        self.store.set_document(1, index, "A summary")
+        
+        self.assertEqual(self.store.list_sessions()[0]['document'], index.fingerprint)
+        self.assertIsNone(self.store.load_summary(before))
+        self.assertEqual(self.store.load_document(index.fingerprint)[1], index.content)
+        self.assertEqual(self.document_count(), 1)
+    
+    def test_text_appended_after_queueing_is_not_stored(self):
+        index = DocumentIndex("The first paragraph is long enough to index.", name="notes.txt")
+        self.store.add_session(1, "Chat 1", 10.0)
+        self.store.set_document(1, index, "A summary")
+        content, fingerprint = index.content, index.fingerprint
+        index.append("A second paragraph is added to the document.")
+        self.assertEqual(self.store.load_document(fingerprint)[1], content)
+    
+    def test_shared_document_kept_while_used(self):
+        first = DocumentIndex("The first document is long enough to index.")
+        second = DocumentIndex("The second document is long enough to index.")
+        for session_id in (1, 2):
+            self.store.add_session(session_id, f"Chat {session_id}", 10.0)
+            self.store.set_document(session_id, first, "First")
+        self.store.set_document(1, second, "Second")
+        self.assertEqual(self.document_count(), 2)
+        self.store.set_document(2, second, "Second")
+        self.assertEqual(self.document_count(), 1)
+        self.assertIsNone(self.store.load_summary(first.fingerprint))
+    
+    def test_reads_from_several_threads(self):
+        self.store.add_session(1, "Chat 1", 10.0)
+        for i in range(100):
+            self.store.add_message(1, 'user', f"Message {i}", float(i))
+        errors = []
+        
+        def read():
+            try:
+                for _ in range(20):
+                    self.assertEqual(len(self.store.load_messages(1)), 100)
+                    self.store.list_sessions()
+            except Exception as e:
+                errors.append(e)
+        
+        threads = [threading.Thread(target=read) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+if __name__ == '__main__':
+    unittest.main()